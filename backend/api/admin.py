@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Trip, TripCollaborator, ItineraryItem, Poll, PollOption, Vote, ChatMessage, TripInvite
+from . import search
+from .models import Trip, TripCollaborator, ItineraryItem, Poll, PollOption, Vote, ChatMessage, ChatArchiveChunk, TripInvite, OutboundEmail
 
 
 @admin.register(Trip)
@@ -43,7 +44,25 @@ class ChatMessageAdmin(admin.ModelAdmin):
     list_display = ("id", "trip", "sender", "created_at")
     search_fields = ("content",)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of an icontains scan over every message
+        if not search_term or not search.indexed():
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(id__in=search.matching_ids("chat", search_term)), False
+
+
+@admin.register(ChatArchiveChunk)
+class ChatArchiveChunkAdmin(admin.ModelAdmin):
+    list_display = ("id", "trip", "message_count", "first_at", "last_at")
+    exclude = ("data",)
+
 
 @admin.register(TripInvite)
 class TripInviteAdmin(admin.ModelAdmin):
     list_display = ("id", "trip", "email", "accepted", "created_at")
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "to_email", "subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
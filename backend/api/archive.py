@@ -0,0 +1,110 @@
+"""Chat tiering: move a trip's oldest messages out of ChatMessage into compressed chunks.
+
+Only a prefix of each trip (by created_at, id) is ever archived, so the hot table keeps
+the newest messages and its (trip, created_at, id) index stays small. Reads that go past
+the hot tier continue into the chunks; see api.chat.messages_before.
+"""
+import json
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChatArchiveChunk, ChatMessage, Trip
+
+
+def _us(value: datetime) -> int:
+    return int(value.timestamp() * 1_000_000)
+
+
+def _from_us(value: int) -> datetime:
+    return datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=value)
+
+
+def encode_rows(rows: List[tuple]) -> bytes:
+    """[(id, sender_id, content, created_at), ...] -> compressed JSON; timestamps as epoch microseconds."""
+    return zlib.compress(json.dumps([[i, s, c, _us(at)] for i, s, c, at in rows], separators=(",", ":")).encode())
+
+
+def decode_rows(data: bytes) -> List[tuple]:
+    return [(i, s, c, _from_us(at)) for i, s, c, at in json.loads(zlib.decompress(bytes(data)))]
+
+
+def archive_trip(trip_id: int, cutoff: Optional[datetime] = None, chunk_size: Optional[int] = None) -> int:
+    """Archive the trip's messages created before `cutoff` (all of them when None); returns the count moved.
+
+    Each chunk is written and its source rows deleted in one transaction, so a message is
+    always in exactly one tier. The trip's newest part-filled chunk is topped up first.
+    """
+    size = chunk_size or getattr(settings, "CHAT_ARCHIVE_CHUNK_SIZE", 500)
+    moved = 0
+    while True:
+        with transaction.atomic():
+            # Only the newest chunk may grow, or chunks would stop being ordered
+            tail = ChatArchiveChunk.objects.select_for_update().filter(trip_id=trip_id).order_by("-last_at", "-max_id").first()
+            if tail is not None and tail.message_count >= size:
+                tail = None
+            room = size - tail.message_count if tail else size
+            hot = ChatMessage.objects.select_for_update().filter(trip_id=trip_id)
+            if cutoff is not None:
+                hot = hot.filter(created_at__lt=cutoff)
+            batch = list(hot.order_by("created_at", "id").values_list("id", "sender_id", "content", "created_at")[:room])
+            if not batch:
+                return moved
+            rows = (decode_rows(tail.data) if tail else []) + batch
+            chunk = tail or ChatArchiveChunk(trip_id=trip_id)
+            chunk.first_at, chunk.last_at = rows[0][3], rows[-1][3]
+            chunk.min_id = min(r[0] for r in rows)
+            chunk.max_id = max(r[0] for r in rows)
+            chunk.message_count = len(rows)
+            chunk.data = encode_rows(rows)
+            chunk.save()
+            ChatMessage.objects.filter(id__in=[r[0] for r in batch]).delete()
+            moved += len(batch)
+
+
+def candidate_trips(now: Optional[datetime] = None, after_days: Optional[int] = None,
+                    ended_days: Optional[int] = None) -> Iterator[tuple]:
+    """(trip_id, cutoff) pairs with something to archive: messages past CHAT_ARCHIVE_AFTER_DAYS,
+    or every message of trips that ended more than CHAT_ARCHIVE_ENDED_TRIP_DAYS ago (cutoff None)."""
+    now = now or timezone.now()
+    if after_days is None:
+        after_days = getattr(settings, "CHAT_ARCHIVE_AFTER_DAYS", 90)
+    if ended_days is None:
+        ended_days = getattr(settings, "CHAT_ARCHIVE_ENDED_TRIP_DAYS", 30)
+    cutoff = now - timedelta(days=after_days)
+    ended_before = (now - timedelta(days=ended_days)).date()
+    ended = set(
+        Trip.objects.filter(end_date__lt=ended_before, messages__isnull=False).values_list("id", flat=True).distinct()
+    )
+    for trip_id in sorted(ended):
+        yield trip_id, None
+    aged = (
+        ChatMessage.objects.filter(created_at__lt=cutoff).exclude(trip_id__in=ended)
+        .values_list("trip_id", flat=True).distinct().order_by("trip_id")
+    )
+    for trip_id in aged:
+        yield trip_id, cutoff
+
+
+def archived_before(trip_id: int, at: Optional[datetime], before_id: Optional[int]) -> Iterator[tuple]:
+    """Archived rows strictly older than (at, before_id), newest first; everything when `at` is None."""
+    chunks = ChatArchiveChunk.objects.filter(trip_id=trip_id).order_by("-last_at", "-max_id")
+    if at is not None:
+        chunks = chunks.filter(first_at__lte=at)
+    for chunk in chunks.only("data").iterator(chunk_size=4):
+        for row in reversed(decode_rows(chunk.data)):
+            if at is None or (row[3], row[0]) < (at, before_id):
+                yield row
+
+
+def archived_row(trip_id: int, message_id: int) -> Optional[tuple]:
+    chunks = ChatArchiveChunk.objects.filter(trip_id=trip_id, min_id__lte=message_id, max_id__gte=message_id)
+    for chunk in chunks.only("data"):
+        for row in decode_rows(chunk.data):
+            if row[0] == message_id:
+                return row
+    return None
@@ -0,0 +1,159 @@
+"""Stateless JWT authentication: the user comes from token claims plus a small TTL cache.
+
+Access and refresh tokens carry the user's token version (`tv`). Bumping it with
+revoke_tokens() invalidates every token issued before, without a blacklist table.
+"""
+from typing import Optional
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .models import TokenVersion
+
+TOKEN_VERSION_CLAIM = "tv"
+# WebSocket clients can't set headers, so they offer subprotocols ["bearer", <access token>].
+# Not a ?token= query: query strings end up in access and proxy logs.
+WS_SUBPROTOCOL = "bearer"
+# Only what serializers read from request.user; anything else loads lazily from the DB
+USER_FIELDS = ("id", "username", "email", "is_active")
+
+
+def _key(user_id) -> str:
+    return f"au:{user_id}"
+
+
+def user_state(user_id: int) -> Optional[dict]:
+    """{"username", "email", "is_active", "tv"} for the user, cached for AUTH_USER_CACHE_TTL; None if gone."""
+    key = _key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = (
+            # Primary, not a replica: a revoke must take effect as soon as the cache entry is dropped
+            get_user_model().objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id)
+            .values("username", "email", "is_active", tv=F("token_version__version"))
+            .first()
+        )
+        if row is None:
+            return None
+        state = dict(row, tv=row["tv"] or 0)
+        cache.set(key, state, timeout=getattr(settings, "AUTH_USER_CACHE_TTL", 60))
+    return state
+
+
+def invalidate(*user_ids: int) -> None:
+    cache.delete_many([_key(uid) for uid in user_ids if uid is not None])
+
+
+def revoke_tokens(user_id: int) -> None:
+    """Invalidate every access and refresh token issued to the user so far."""
+    updated = TokenVersion.objects.filter(user_id=user_id).update(version=F("version") + 1)
+    if not updated:
+        TokenVersion.objects.get_or_create(user_id=user_id, defaults={"version": 1})
+    invalidate(user_id)
+
+
+def _check(user_id, token) -> dict:
+    state = user_state(user_id)
+    if state is None:
+        raise exceptions.AuthenticationFailed("User not found", code="user_not_found")
+    if not state["is_active"]:
+        raise exceptions.AuthenticationFailed("User is inactive", code="user_inactive")
+    if token.get(TOKEN_VERSION_CLAIM, 0) != state["tv"]:
+        raise exceptions.AuthenticationFailed("Token has been revoked", code="token_revoked")
+    return state
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication without the per-request User query.
+
+    request.user is a real User instance built with from_db() from the cached fields, so it can
+    be assigned to foreign keys; other fields are deferred and load on first access.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = int(validated_token[jwt_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken("Token contained no recognizable user identification")
+        state = _check(user_id, validated_token)
+        return get_user_model().from_db(
+            DEFAULT_DB_ALIAS, USER_FIELDS, (user_id, state["username"], state["email"], state["is_active"])
+        )
+
+
+class _VersionedToken:
+    """Stamps the user's current token version on every token issued with for_user()."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        state = user_state(user.pk)
+        token[TOKEN_VERSION_CLAIM] = state["tv"] if state else 0
+        return token
+
+
+class TripAccessToken(_VersionedToken, AccessToken):
+    pass
+
+
+class TripRefreshToken(_VersionedToken, RefreshToken):
+    """Its .access_token copies the tv claim along with the others."""
+
+
+class TripTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = TripRefreshToken
+
+
+class TripTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuses refresh tokens of inactive users or from before the last revoke_tokens()."""
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs["refresh"])
+        _check(refresh.get(jwt_settings.USER_ID_CLAIM), refresh)
+        return super().validate(attrs)
+
+
+def _ws_token(scope) -> tuple:
+    """(raw access token, subprotocol to echo on accept) from the subprotocol list."""
+    protocols = scope.get("subprotocols") or []
+    if WS_SUBPROTOCOL in protocols:
+        idx = protocols.index(WS_SUBPROTOCOL)
+        if idx + 1 < len(protocols):
+            return protocols[idx + 1], WS_SUBPROTOCOL
+    return None, None
+
+
+@database_sync_to_async
+def _ws_user(raw: str):
+    # Signature check is local; user_state() only touches the DB on a cache miss
+    auth = ClaimsJWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw.encode()))
+    except exceptions.AuthenticationFailed:
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Sets scope["user"] from a JWT access token, in place of the session-based AuthMiddlewareStack.
+
+    scope["subprotocol"] is set when the token came in; the consumer must accept with it
+    or browsers drop the connection.
+    """
+
+    async def __call__(self, scope, receive, send):
+        raw, subprotocol = _ws_token(scope)
+        user = await _ws_user(raw) if raw else AnonymousUser()
+        scope = dict(scope, user=user, subprotocol=subprotocol)
+        return await super().__call__(scope, receive, send)
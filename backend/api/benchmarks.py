@@ -0,0 +1,501 @@
+"""Seeded benchmark data and scripted scenarios for `seed_bench_data` / `run_benchmarks` / `bench_fanout` / `soak_db_pool`."""
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import islice
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, List
+
+from channels.layers import get_channel_layer
+from channels.testing import HttpCommunicator, WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from . import dbpool
+from .authentication import TripAccessToken
+from .consumers import TripChatConsumer
+from .dbstats import count_queries
+from .events import encode_frame, trip_group
+from .models import ChatMessage, ItineraryItem, Poll, PollOption, Trip, TripCollaborator, Vote
+from .voting import reconcile_vote_counts
+
+User = get_user_model()
+
+# Every seeded row hangs off a user with this username prefix, so --reset only touches bench data
+BENCH_PREFIX = "bench_"
+BENCH_TRIP_PREFIX = "bench trip "
+
+
+# ---------------------------------------------------------------- data generator
+
+def _bulk(model, rows: Iterable, batch_size: int) -> int:
+    """bulk_create from a generator in fixed-size transactions, never holding more than one batch."""
+    rows = iter(rows)
+    created = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return created
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+
+
+def seed(users: int, trips: int, items: int, messages: int, polls: int, options_per_poll: int = 4,
+         votes_per_poll: int = 10, collaborators_per_trip: int = 3, batch_size: int = 5000,
+         seed_value: int = 1, log: Callable[[str], None] = print) -> Dict[str, int]:
+    """Generate a deterministic dataset (same seed, same rows) with bulk_create.
+
+    Rows are spread round-robin over trips so itinerary order values and chat ids grow the way
+    they do in production. Returns row counts per model.
+    """
+    rng = random.Random(seed_value)
+    password = make_password("bench")  # hashed once, shared by every bench user
+    counts = {}
+
+    start = User.objects.filter(username__startswith=BENCH_PREFIX).count()
+    counts["users"] = _bulk(User, (
+        User(username=f"{BENCH_PREFIX}{i:07d}", email=f"{BENCH_PREFIX}{i}@bench.local", password=password)
+        for i in range(start, start + users)
+    ), batch_size)
+    user_ids = list(User.objects.filter(username__startswith=BENCH_PREFIX).order_by("id").values_list("id", flat=True))
+    if not user_ids:
+        return counts
+    log(f"users: {counts['users']}")
+
+    first_trip = Trip.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    counts["trips"] = _bulk(Trip, (
+        Trip(owner_id=rng.choice(user_ids), name=f"{BENCH_TRIP_PREFIX}{i}", description="Seeded for benchmarks")
+        for i in range(trips)
+    ), batch_size)
+    trip_rows = list(
+        Trip.objects.filter(id__gt=first_trip, name__startswith=BENCH_TRIP_PREFIX).order_by("id").values_list("id", "owner_id")
+    )
+    if not trip_rows:
+        return counts
+    log(f"trips: {counts['trips']}")
+
+    members = {trip_id: [owner_id] for trip_id, owner_id in trip_rows}
+
+    def collaborators():
+        for trip_id, owner_id in trip_rows:
+            for user_id in rng.sample(user_ids, min(collaborators_per_trip, len(user_ids))):
+                if user_id != owner_id:
+                    members[trip_id].append(user_id)
+                    yield TripCollaborator(trip_id=trip_id, user_id=user_id, role=rng.choice(("editor", "viewer")))
+
+    counts["collaborators"] = _bulk(TripCollaborator, collaborators(), batch_size)
+    log(f"collaborators: {counts['collaborators']}")
+
+    trip_count = len(trip_rows)
+    gap = 1024
+    counts["itinerary_items"] = _bulk(ItineraryItem, (
+        ItineraryItem(trip_id=trip_rows[n % trip_count][0], title=f"Stop {n // trip_count + 1}",
+                      order=(n // trip_count + 1) * gap)
+        for n in range(items)
+    ), batch_size)
+    log(f"itinerary items: {counts['itinerary_items']}")
+
+    def chat():
+        for n in range(messages):
+            trip_id = trip_rows[n % trip_count][0]
+            yield ChatMessage(trip_id=trip_id, sender_id=rng.choice(members[trip_id]), content=f"bench message {n}")
+
+    counts["chat_messages"] = _bulk(ChatMessage, chat(), batch_size)
+    log(f"chat messages: {counts['chat_messages']}")
+
+    first_poll = Poll.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    counts["polls"] = _bulk(Poll, (
+        Poll(trip_id=trip_rows[n % trip_count][0], created_by_id=trip_rows[n % trip_count][1], question=f"Bench poll {n}?")
+        for n in range(polls)
+    ), batch_size)
+    poll_ids = list(Poll.objects.filter(id__gt=first_poll, question__startswith="Bench poll ").values_list("id", flat=True))
+    counts["poll_options"] = _bulk(PollOption, (
+        PollOption(poll_id=poll_id, text=f"Option {j + 1}") for poll_id in poll_ids for j in range(options_per_poll)
+    ), batch_size)
+    options = {}
+    for option_id, poll_id in PollOption.objects.filter(poll_id__in=poll_ids).values_list("id", "poll_id").iterator():
+        options.setdefault(poll_id, []).append(option_id)
+    counts["votes"] = _bulk(Vote, (
+        Vote(poll_id=poll_id, option_id=rng.choice(options[poll_id]), user_id=user_id)
+        for poll_id in poll_ids if options.get(poll_id)
+        for user_id in rng.sample(user_ids, min(votes_per_poll, len(user_ids)))
+    ), batch_size)
+    # Only the seeded polls: reconciling everything would bump every trip's version on a shared DB
+    for n in range(0, len(poll_ids), batch_size):
+        reconcile_vote_counts(*poll_ids[n:n + batch_size])
+    log(f"polls: {counts['polls']}, options: {counts['poll_options']}, votes: {counts['votes']}")
+    return counts
+
+
+def reset() -> int:
+    """Delete every bench user; trips, items, messages, polls and votes cascade."""
+    deleted, _ = User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+    return deleted
+
+
+def dataset_counts() -> Dict[str, int]:
+    return {
+        "users": User.objects.filter(username__startswith=BENCH_PREFIX).count(),
+        "trips": Trip.objects.filter(name__startswith=BENCH_TRIP_PREFIX).count(),
+        "itinerary_items": ItineraryItem.objects.filter(trip__name__startswith=BENCH_TRIP_PREFIX).count(),
+        "chat_messages": ChatMessage.objects.filter(trip__name__startswith=BENCH_TRIP_PREFIX).count(),
+        "polls": Poll.objects.filter(trip__name__startswith=BENCH_TRIP_PREFIX).count(),
+    }
+
+
+# ---------------------------------------------------------------- scenarios
+
+def _summary(samples: List[float], queries: List[int]) -> dict:
+    ms = sorted(x * 1000 for x in samples) or [0.0]
+
+    def pct(p):
+        return round(ms[min(len(ms) - 1, int(len(ms) * p))], 3)
+
+    return {
+        "iterations": len(samples),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "queries_per_request": round(statistics.fmean(queries), 2) if queries else 0,
+    }
+
+
+class _Context:
+    """The first seeded trip and a JWT-authenticated client for its owner."""
+
+    def __init__(self):
+        trip = (
+            Trip.objects.filter(name__startswith=BENCH_TRIP_PREFIX)
+            .select_related("owner").order_by("id").first()
+        )
+        if trip is None:
+            raise LookupError("No bench data; run `manage.py seed_bench_data` first")
+        self.trip = trip
+        self.user = trip.owner
+        self.client = APIClient()
+        # Real Bearer tokens so authentication cost is part of every sample
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {TripAccessToken.for_user(self.user)}")
+        self.item_ids = list(trip.itinerary_items.order_by("order", "id").values_list("id", flat=True))
+        self.poll = Poll.objects.filter(trip=trip).prefetch_related("options").order_by("id").first()
+
+    def timed(self, request: Callable, iterations: int, warmup: int, expect: int) -> dict:
+        samples, queries = [], []
+        for i in range(warmup + iterations):
+            with count_queries() as counter:
+                start = time.perf_counter()
+                response = request(i)
+                elapsed = time.perf_counter() - start
+            if response.status_code != expect:
+                raise RuntimeError(f"unexpected {response.status_code}: {response.content[:200]!r}")
+            if i >= warmup:
+                samples.append(elapsed)
+                queries.append(counter.count)
+        return _summary(samples, queries)
+
+
+def _trip_list(ctx: _Context, iterations: int, warmup: int) -> dict:
+    return ctx.timed(lambda i: ctx.client.get("/api/trips/"), iterations, warmup, 200)
+
+
+def _itinerary_reorder(ctx: _Context, iterations: int, warmup: int) -> dict:
+    if len(ctx.item_ids) < 2:
+        raise LookupError("bench trip needs at least two itinerary items")
+    url = f"/api/trips/{ctx.trip.id}/reorder-itinerary/"
+    ids = ctx.item_ids
+
+    def move(i):
+        # Alternate a single-item move to the end and back to the front
+        body = {"id": ids[0], "after": ids[-1]} if i % 2 == 0 else {"id": ids[0], "before": ids[1]}
+        return ctx.client.post(url, body, format="json")
+
+    return ctx.timed(move, iterations, warmup, 200)
+
+
+def _poll_vote(ctx: _Context, iterations: int, warmup: int) -> dict:
+    if ctx.poll is None or len(ctx.poll.options.all()) < 2:
+        raise LookupError("bench trip needs a poll with at least two options")
+    url = f"/api/polls/{ctx.poll.id}/vote/"
+    option_ids = [o.id for o in ctx.poll.options.all()]
+    # Switch between options so every sample does real work
+    return ctx.timed(
+        lambda i: ctx.client.post(url, {"option_id": option_ids[i % len(option_ids)]}, format="json"),
+        iterations, warmup, 200,
+    )
+
+
+def _chat_send(ctx: _Context, iterations: int, warmup: int) -> dict:
+    return ctx.timed(
+        lambda i: ctx.client.post("/api/messages/", {"trip": ctx.trip.id, "content": f"bench send {i}"}, format="json"),
+        iterations, warmup, 201,
+    )
+
+
+SCENARIOS = {
+    "trip_list": _trip_list,
+    "itinerary_reorder": _itinerary_reorder,
+    "poll_vote": _poll_vote,
+    "chat_send": _chat_send,
+}
+
+
+def run_scenarios(names: List[str], iterations: int, warmup: int, fanout: dict = None) -> dict:
+    """Run the named HTTP scenarios (plus ws_fanout) and return a JSON-serialisable report."""
+    report = {"meta": _meta(), "scenarios": {}}
+    # Rate limits would turn a benchmark into a 429 benchmark
+    with override_settings(ALLOWED_HOSTS=["*"], RATE_LIMITS={"default": f"{10 ** 9}/60"}):
+        http = [n for n in names if n in SCENARIOS]
+        if http:
+            ctx = _Context()
+            for name in http:
+                report["scenarios"][name] = SCENARIOS[name](ctx, iterations, warmup)
+    if "ws_fanout" in names:
+        fanout = fanout or {}
+        result = asyncio.run(run_fanout(
+            FanoutConsumer, fanout.get("sockets", 100), fanout.get("rate", 100), fanout.get("duration", 2.0)
+        ))
+        report["scenarios"]["ws_fanout"] = {k: round(v, 3) if isinstance(v, float) else v for k, v in result.items()}
+    return report
+
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "commit": commit,
+        "database": connection.vendor,
+        "dataset": dataset_counts(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def compare(old: dict, new: dict, threshold: float) -> List[dict]:
+    """Per-metric deltas between two reports; `regression` is set when a latency grew by more than threshold %."""
+    rows = []
+    for name, metrics in sorted(new.get("scenarios", {}).items()):
+        before = old.get("scenarios", {}).get(name, {})
+        for key in ("p50_ms", "p95_ms", "p99_ms", "queries_per_request"):
+            if key not in metrics or key not in before:
+                continue
+            delta = ((metrics[key] - before[key]) / before[key] * 100) if before[key] else 0.0
+            rows.append({
+                "scenario": name, "metric": key, "old": before[key], "new": metrics[key], "delta_pct": round(delta, 1),
+                "regression": delta > threshold if key != "queries_per_request" else metrics[key] > before[key],
+            })
+    return rows
+
+
+def dump_report(report: dict) -> str:
+    # Sorted keys and fixed indentation so reports diff cleanly between commits
+    return json.dumps(report, indent=2, sort_keys=True) + "\n"
+
+
+# ---------------------------------------------------------------- websocket fan-out
+
+class FanoutConsumer(TripChatConsumer):
+    async def _user_allowed(self, trip_id, user_id):
+        return True
+
+
+class PerSocketEncodeConsumer(FanoutConsumer):
+    # Previous behaviour: every socket re-encodes every event
+    async def chat_message(self, event):
+        await self.send(text_data=json.dumps({"type": "chat", "message": event["message"]}))
+
+
+async def run_fanout(consumer, sockets: int, rate: int, duration: float) -> dict:
+    """Connect N sockets to one group, publish `rate` msgs/sec for `duration` and time delivery."""
+    layer = get_channel_layer()
+    trip_id = 900000 + int(time.time() * 1000) % 100000  # fresh group per run
+    app = consumer.as_asgi()
+    comms = []
+    for i in range(sockets):
+        comm = WebsocketCommunicator(app, f"/ws/trips/{trip_id}/")
+        comm.scope["url_route"] = {"kwargs": {"trip_id": str(trip_id)}}
+        comm.scope["user"] = SimpleNamespace(id=i + 1)
+        await comm.connect()
+        comms.append(comm)
+
+    total = int(rate * duration)
+    sent_at = {}
+    latencies = []
+    frames = [0]
+
+    async def drain(comm):
+        seen = 0
+        while seen < total:
+            try:
+                text = await comm.receive_from(timeout=2)
+            except asyncio.TimeoutError:
+                return
+            now = time.perf_counter()
+            frames[0] += 1
+            data = json.loads(text)
+            events = data["events"] if data["type"] == "batch" else [data]
+            for event in events:
+                latencies.append(now - sent_at[event["message"]["id"]])
+            seen += len(events)
+
+    readers = [asyncio.ensure_future(drain(c)) for c in comms]
+    cpu_start = time.process_time()
+    for msg_id in range(total):
+        message = {"id": msg_id, "trip": trip_id, "content": f"bench {msg_id}", "created_at": "", "sender": {"id": 0, "username": "bench"}}
+        sent_at[msg_id] = time.perf_counter()
+        await layer.group_send(trip_group(trip_id), {
+            "type": "chat.message", "id": msg_id, "message": message,
+            "frame": encode_frame({"type": "chat", "message": message}),
+        })
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*readers)
+    cpu = time.process_time() - cpu_start
+    for comm in comms:
+        await comm.disconnect()
+
+    ms = sorted(x * 1000 for x in latencies) or [0.0]
+    return {
+        "sockets": sockets,
+        "sent": total,
+        "delivered": len(latencies),
+        "frames": frames[0],
+        "p50_ms": statistics.median(ms),
+        "p99_ms": ms[min(len(ms) - 1, int(len(ms) * 0.99))],
+        "cpu_s": cpu,
+    }
+
+
+# ---------------------------------------------------------------- connection pool soak
+
+async def _soak_http(app, ctx: _Context, token: str, deadline: float, status: Counter) -> None:
+    trip_id = ctx.trip.id
+    requests = [
+        ("GET", "/api/trips/", b""),
+        ("GET", f"/api/itinerary-items/?trip={trip_id}", b""),
+        ("GET", f"/api/messages/?trip={trip_id}", b""),
+        ("POST", "/api/messages/", json.dumps({"trip": trip_id, "content": "soak"}).encode()),
+    ]
+    headers = [
+        (b"host", b"testserver"),
+        (b"authorization", f"Bearer {token}".encode()),
+        (b"content-type", b"application/json"),
+    ]
+    i = 0
+    while time.monotonic() < deadline:
+        method, path, body = requests[i % len(requests)]
+        comm = HttpCommunicator(app, method, path, body=body, headers=headers + [(b"content-length", b"%d" % len(body))])
+        response = await comm.get_response(timeout=60)
+        # Let the handler finish: response.close() is what hands the connection back
+        await comm.wait(timeout=60)
+        status[response["status"]] += 1
+        i += 1
+
+
+async def _soak_ws(app, trip_id: int, token: str, deadline: float, interval: float, status: Counter) -> None:
+    comm = WebsocketCommunicator(app, f"/ws/trips/{trip_id}/", subprotocols=["bearer", token])
+    connected, _ = await comm.connect(timeout=60)
+    if not connected:
+        status["ws_refused"] += 1
+        return
+    n = 0
+    while time.monotonic() < deadline:
+        await comm.send_json_to({"type": "chat.send", "content": f"soak {n}", "client_id": n})
+        # Other sockets' messages arrive in between; wait for our own ack
+        while True:
+            frame = await comm.receive_json_from(timeout=60)
+            if frame.get("type") in ("ack", "error") and frame.get("client_id") == n:
+                break
+        status["ws_ack" if frame["type"] == "ack" else "ws_error"] += 1
+        n += 1
+        await asyncio.sleep(interval)
+    await comm.disconnect()
+
+
+async def _soak(app, ctx: _Context, duration: float, http_workers: int, sockets: int, ws_interval: float) -> dict:
+    token = str(TripAccessToken.for_user(ctx.user))
+    deadline = time.monotonic() + duration
+    status = Counter()
+    peaks = {}
+
+    async def sample():
+        while time.monotonic() < deadline:
+            for alias, stats in dbpool.pool_stats().items():
+                peak = peaks.setdefault(alias, {"open": 0, "in_use": 0, "waiting": 0})
+                for key in peak:
+                    peak[key] = max(peak[key], stats[key])
+            await asyncio.sleep(0.02)
+
+    await asyncio.gather(
+        sample(),
+        *(_soak_http(app, ctx, token, deadline, status) for _ in range(http_workers)),
+        *(_soak_ws(app, ctx.trip.id, token, deadline, ws_interval, status) for _ in range(sockets)),
+    )
+    return {"status": status, "peaks": peaks}
+
+
+def run_soak(duration: float, http_workers: int, sockets: int, ws_interval: float) -> dict:
+    """Mixed HTTP + WebSocket load through the real ASGI app while sampling the DB pool.
+
+    `bounded` is False if the pool ever held more than SIZE + MAX_OVERFLOW connections; without
+    DB_POOL there is no pool and only `checkouts` / `threads` are reported.
+    """
+    threads, checkouts = set(), [0]
+
+    def on_connect(sender, connection, **kwargs):
+        threads.add(threading.get_ident())
+        checkouts[0] += 1
+
+    with override_settings(ALLOWED_HOSTS=["*"], RATE_LIMITS={"default": f"{10 ** 9}/60"}):
+        # Imported here so the middleware chain is built with the overridden rate limits
+        from tripplanner.asgi import application
+
+        ctx = _Context()
+        connection.close()  # hand the setup connection back before the clock starts
+        connection_created.connect(on_connect)
+        start = time.monotonic()
+        try:
+            result = asyncio.run(_soak(application, ctx, duration, http_workers, sockets, ws_interval))
+        finally:
+            connection_created.disconnect(on_connect)
+        elapsed = time.monotonic() - start
+
+    status = result["status"]
+    http = sum(n for code, n in status.items() if isinstance(code, int))
+    report = {
+        "duration_s": round(elapsed, 2),
+        "http_requests": http,
+        "http_errors": sum(n for code, n in status.items() if isinstance(code, int) and code >= 400),
+        "ws_messages": status["ws_ack"],
+        "ws_refused": status["ws_refused"],
+        "ws_errors": status["ws_error"],
+        "checkouts": checkouts[0],
+        "threads": len(threads),
+        "pools": {},
+    }
+    for alias, stats in dbpool.pool_stats().items():
+        peak = result["peaks"].get(alias, {})
+        report["pools"][alias] = {
+            "size": stats["size"],
+            "max_overflow": stats["max_overflow"],
+            "peak_open": peak.get("open", 0),
+            "peak_in_use": peak.get("in_use", 0),
+            "peak_waiting": peak.get("waiting", 0),
+            "open_after": stats["open"],
+            "created": stats["created"],
+            "timeouts": stats["timeouts"],
+            "bounded": peak.get("open", 0) <= stats["size"] + stats["max_overflow"],
+        }
+    return report
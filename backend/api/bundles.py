@@ -0,0 +1,63 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from . import encoding
+from .chat import messages_before
+from .models import ItineraryItem, Poll, PollOption, Trip
+from .serializers import ItineraryItemSerializer, PollSerializer, TripSerializer
+
+
+def _key(trip_id: int) -> str:
+    return f"tb:{trip_id}"
+
+
+def _render(trip: Trip) -> bytes:
+    """Trip + itinerary + polls as a JSON object body without its closing brace."""
+    trip = Trip.objects.select_related("owner").prefetch_related("collaborators").get(pk=trip.pk)
+    items = ItineraryItem.objects.filter(trip=trip).order_by("order", "id")
+    polls = (
+        Poll.objects.filter(trip=trip)
+        .select_related("created_by")
+        .prefetch_related(Prefetch("options", queryset=PollOption.objects.order_by("id")))
+        .order_by("-created_at", "-id")
+    )
+    body = encoding.dumps({
+        "trip": TripSerializer(trip).data,
+        "itinerary": ItineraryItemSerializer(items, many=True).data,
+        "polls": PollSerializer(polls, many=True).data,
+    })
+    return body[:-1]
+
+
+def _recent_chat(trip_id: int) -> bytes:
+    # Same rows as ChatMessageSerializer; falls through to the archive for quiet trips
+    recent, _ = messages_before(trip_id, None, getattr(settings, "TRIP_BUNDLE_CHAT_LIMIT", 50))
+    return encoding.dumps(recent)
+
+
+def trip_bundle(trip_id: int) -> Optional[bytes]:
+    """JSON bytes for GET /trips/<id>/bundle/, or None if the trip does not exist.
+
+    Trip, itinerary and polls are cached pre-rendered, stamped with the trip's version and
+    updated_at; the signals in api.signals bump both on every write, so a stale entry (including
+    one stored by a render that raced a write) never matches. Chat changes too often to share
+    that stamp and is appended fresh on every request.
+    """
+    trip = Trip.objects.filter(pk=trip_id).only("id", "version", "updated_at").first()
+    if trip is None:
+        return None
+    stamp = (trip.version, trip.updated_at.isoformat())
+    cached = cache.get(_key(trip_id))
+    if cached is not None and cached[0] == stamp:
+        head = cached[1]
+    else:
+        head = _render(trip)
+        cache.set(_key(trip_id), (stamp, head), timeout=getattr(settings, "TRIP_BUNDLE_CACHE_TTL", 300))
+    return head + b',"chat":' + _recent_chat(trip_id) + b"}"
+
+
+def invalidate(*trip_ids: int) -> None:
+    cache.delete_many([_key(tid) for tid in trip_ids if tid is not None])
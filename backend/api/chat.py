@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import DateTimeField, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from . import archive
+from .models import ChatMessage
+from .rows import CHAT_VALUES, chat_rows
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def messages_after(trip_id: int, last_seen_id: int):
+    """Messages in a trip newer than `last_seen_id`, oldest first.
+
+    Anchors on the last seen message's created_at so the scan is a range on the
+    (trip, created_at, id) index rather than a filter over the whole trip; an unknown
+    id falls back to the start of the trip.
+    """
+    anchor = ChatMessage.objects.filter(id=last_seen_id, trip_id=trip_id).values("created_at")[:1]
+    since = Coalesce(Subquery(anchor), Value(_EPOCH), output_field=DateTimeField())
+    return (
+        ChatMessage.objects.filter(trip_id=trip_id, created_at__gte=since, id__gt=last_seen_id)
+        .select_related("sender")
+        .order_by("created_at", "id")
+    )
+
+
+def messages_before(trip_id: int, before_id: Optional[int], limit: int) -> Tuple[List[dict], bool]:
+    """Up to `limit` messages older than `before_id` (newest ones when None), oldest first, plus
+    whether more exist. Reads the hot table first and continues into the archive, so paging
+    backwards never sees the tier boundary. Rows match ChatMessageSerializer.
+
+    Raises ChatMessage.DoesNotExist when `before_id` is not a message of the trip in either tier.
+    """
+    at = None
+    if before_id is not None:
+        at = ChatMessage.objects.filter(id=before_id, trip_id=trip_id).values_list("created_at", flat=True).first()
+        if at is None:
+            row = archive.archived_row(trip_id, before_id)
+            if row is None:
+                raise ChatMessage.DoesNotExist(f"message {before_id} not in trip {trip_id}")
+            at = row[3]
+    hot = ChatMessage.objects.filter(trip_id=trip_id)
+    if before_id is not None:
+        hot = hot.filter(Q(created_at__lt=at) | Q(created_at=at, id__lt=before_id))
+    found = list(hot.order_by("-created_at", "-id").values(*CHAT_VALUES)[: limit + 1])
+
+    if len(found) <= limit:
+        cold = []
+        for row in archive.archived_before(trip_id, at, before_id):
+            cold.append(row)
+            if len(found) + len(cold) > limit:
+                break
+        if cold:
+            users = get_user_model().objects.only("id", "username", "email").in_bulk({r[1] for r in cold})
+            for message_id, sender_id, content, created_at in cold:
+                sender = users.get(sender_id)
+                if sender is None:
+                    continue  # sender deleted; hot rows would have cascaded too
+                found.append({
+                    "id": message_id,
+                    "trip_id": trip_id,
+                    "sender_id": sender_id,
+                    "sender__username": sender.username,
+                    "sender__email": sender.email,
+                    "content": content,
+                    "created_at": created_at,
+                })
+    more = len(found) > limit
+    return chat_rows(reversed(found[:limit])), more
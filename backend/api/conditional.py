@@ -0,0 +1,57 @@
+import hashlib
+import time
+from functools import wraps
+from typing import Optional, Tuple
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+def trip_validators(trips, scope: str, request, single: bool = True) -> Optional[Tuple[str, Optional[int]]]:
+    """(ETag, Last-Modified timestamp) for a response derived from `trips`, in one aggregate query.
+
+    Any write under a trip bumps Trip.version/updated_at (api.versions), so count + max id +
+    sum(version) + max(updated_at) over the caller's trips changes whenever the payload can.
+    Last-Modified is only given for a single trip: over a collection, deleting or un-sharing a
+    trip drops it from the scope without moving max(updated_at), so only the ETag notices.
+    """
+    state = trips.order_by().aggregate(n=Count("id"), top=Max("id"), v=Sum("version"), m=Max("updated_at"))
+    if not state["n"]:
+        return None
+    raw = "|".join(str(x) for x in (
+        scope, request.user.id, request.META.get("QUERY_STRING", ""), state["n"], state["top"], state["v"],
+        state["m"].isoformat(),
+    ))
+    last_modified = int(state["m"].timestamp()) if single else None
+    if last_modified is not None and last_modified >= int(time.time()):
+        # HTTP dates have whole-second resolution: a later write in this same second would still
+        # match If-Modified-Since, so only the ETag validates until the second has passed
+        last_modified = None
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"', last_modified
+
+
+def conditional(scope: str):
+    """Viewset handler decorator: answer If-None-Match / If-Modified-Since with 304 before any
+    serialization runs. The view supplies `validator_trips()`, the member trips the response covers;
+    a detail route (pk) or a ?trip= filter makes it a single-trip response."""
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            single = bool(kwargs.get("pk") or request.query_params.get("trip"))
+            validators = trip_validators(self.validator_trips(), scope, request, single)
+            if validators is None:
+                return handler(self, request, *args, **kwargs)  # nothing visible; let the view 404 / return []
+            etag, last_modified = validators
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = handler(self, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers.setdefault("ETag", etag)
+                if last_modified is not None:
+                    response.headers.setdefault("Last-Modified", http_date(last_modified))
+                # Validators are per user
+                patch_vary_headers(response, ["Authorization"])
+            return response
+        return wrapper
+    return decorator
@@ -1,63 +1,151 @@
+import asyncio
 import json
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 
-from .models import Trip
+from . import membership, metrics
+from .chat import messages_after
+from .events import batch_frame, chat_event, chat_message_payload, encode_frame, trip_group
+from .models import ChatMessage
+from .ratelimit import CHAT_SEND_BUDGET, SlidingWindowLimiter, budget_rate, user_ident
+from .serializers import ChatMessageSerializer
+
+
+# Counters live in the shared cache, so REST and socket sends draw on one budget per user
+_limiter = SlidingWindowLimiter()
 
 
 class TripChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.trip_id = self.scope["url_route"]["kwargs"]["trip_id"]
-        self.group_name = f"trip_{self.trip_id}"
+        self.trip_id = int(self.scope["url_route"]["kwargs"]["trip_id"])
+        self.group_name = trip_group(self.trip_id)
+        self.backfilled_ids = set()
+        # WS_BATCH_WINDOW_MS > 0 coalesces events arriving within the window into one {"type": "batch"} frame
+        self.batch_window = getattr(settings, "WS_BATCH_WINDOW_MS", 0) / 1000
+        self.batch_max = getattr(settings, "WS_BATCH_MAX_EVENTS", 100)
+        self._pending = []
+        self._flush_task = None
+        self._counted = False
         user = self.scope.get("user")
-        if isinstance(user, AnonymousUser):
+        if user is None or isinstance(user, AnonymousUser):
             await self.close()
             return
-        allowed = await self._user_allowed(int(self.trip_id), user.id)
+        allowed = await self._user_allowed(self.trip_id, user.id)
         if not allowed:
             await self.close()
             return
+        self.user = user
         await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        await self.accept(subprotocol=self.scope.get("subprotocol"))
+        self._counted = True
+        metrics.gauge_add("ws_connections", 1)
+        metrics.inc("ws_connections_total")
+        # ws/trips/<id>/?last_seen_id=N resumes: send what was missed, then live events.
+        # Joined the group first so nothing falls in the gap; live duplicates are skipped in chat_message.
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        last_seen = query.get("last_seen_id", [""])[0]
+        if last_seen.isdigit():
+            limit = getattr(settings, "CHAT_BACKFILL_LIMIT", 500)
+            missed = await self._missed_messages(int(last_seen), limit + 1)
+            self.backfilled_ids = {m["id"] for m in missed[:limit]}
+            await self.send(
+                text_data=encode_frame({"type": "chat.backfill", "messages": missed[:limit], "more": len(missed) > limit})
+            )
 
     async def disconnect(self, close_code):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        if self._counted:
+            self._counted = False
+            metrics.gauge_add("ws_connections", -1)
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def receive(self, text_data=None, bytes_data=None):
-        # For minimal impl: ignore client -> server messages here.
-        pass
+        # Client frames: {"type": "chat.send", "content": "...", "client_id": <opaque, echoed in the ack>}
+        try:
+            frame = json.loads(text_data or "")
+        except ValueError:
+            await self._send_error("invalid json")
+            return
+        if not isinstance(frame, dict) or frame.get("type") != "chat.send":
+            await self._send_error("unsupported frame")
+            return
+        content = frame.get("content")
+        if not isinstance(content, str) or not content.strip():
+            await self._send_error("content required", frame.get("client_id"))
+            return
+        rejected = await self._reject_send(content)
+        if rejected:
+            await self._send_error(rejected, frame.get("client_id"))
+            return
+        # Persist with the async ORM and publish directly, no sync view / async_to_sync bridge
+        message = await ChatMessage.objects.acreate(trip_id=self.trip_id, sender=self.user, content=content)
+        start = time.perf_counter()
+        await self.channel_layer.group_send(self.group_name, chat_event(message, self.user))
+        metrics.observe("channel_layer_send_seconds", time.perf_counter() - start, event="chat")
+        await self.send(
+            text_data=encode_frame(
+                {"type": "ack", "client_id": frame.get("client_id"), "id": message.id, "created_at": message.created_at.isoformat()}
+            )
+        )
 
     async def chat_message(self, event):
-        # Forward message JSON to client
-        await self.send(text_data=json.dumps({"type": "chat", "message": event["message")}))
+        if event["id"] in self.backfilled_ids:
+            return  # already delivered in the backfill
+        # Frame was encoded once by the publisher; forward it as-is
+        await self._push(event["frame"])
 
-    @database_sync_to_async
-    def _user_allowed(self, trip_id: int, user_id: int) -> bool:
-        try:
-            trip = Trip.objects.get(id=trip_id)
-        except Trip.DoesNotExist:
-            return False
-        if trip.owner_id == user_id:
-            return True
-        return trip.collaborators.filter(id=user_id).exists()
-import json
-from channels.generic.websocket import AsyncWebsocketConsumer
+    async def trip_event(self, event):
+        # itinerary.updated / itinerary.reordered / poll.tally, pre-encoded by api.events.publish
+        await self._push(event["frame"])
 
+    async def _push(self, frame: str):
+        if not self.batch_window:
+            await self.send(text_data=frame)
+            return
+        self._pending.append(frame)
+        if len(self._pending) >= self.batch_max:
+            await self._flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_later())
 
-class TripChatConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        self.trip_id = self.scope["url_route"]["kwargs"]["trip_id"]
-        self.group_name = f"trip_{self.trip_id}"
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_window)
+        self._flush_task = None
+        await self._flush()
 
-    async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+    async def _flush(self):
+        frames, self._pending = self._pending, []
+        if len(frames) == 1:
+            await self.send(text_data=frames[0])
+        elif frames:
+            await self.send(text_data=batch_frame(frames))
 
-    async def receive(self, text_data=None, bytes_data=None):
-        # Read-only WS: ignore client messages; HTTP endpoint persists and broadcasts
-        pass
+    async def _send_error(self, detail, client_id=None):
+        await self.send(text_data=encode_frame({"type": "error", "detail": detail, "client_id": client_id}))
 
-    async def chat_message(self, event):
-        await self.send(text_data=json.dumps(event["message"]))
+    @sync_to_async
+    def _reject_send(self, content: str):
+        """Same budget and validation as POST /api/messages/; returns an error detail or None."""
+        limit, window = budget_rate(CHAT_SEND_BUDGET)
+        allowed, retry_after = _limiter.hit(f"{CHAT_SEND_BUDGET}:{user_ident(self.user.id)}", limit, window)
+        if not allowed:
+            return f"rate limit exceeded, retry in {retry_after}s"
+        serializer = ChatMessageSerializer(data={"content": content})
+        if not serializer.is_valid():
+            return "; ".join(str(e) for errors in serializer.errors.values() for e in errors)
+        return None
+
+    @database_sync_to_async
+    def _missed_messages(self, last_seen_id: int, limit: int):
+        return [chat_message_payload(m, m.sender) for m in messages_after(self.trip_id, last_seen_id)[:limit]]
+
+    @database_sync_to_async
+    def _user_allowed(self, trip_id: int, user_id: int) -> bool:
+        return membership.is_member(user_id, trip_id)
@@ -0,0 +1,215 @@
+"""Bounded per-process DB connection pool, used as ENGINE "api.dbpool.<vendor>" (see settings.DB_POOL).
+
+Django opens one connection per thread, and daphne runs sync views on an open-ended set of
+asgiref threads. With the pooled engines, connect() checks a raw connection out of the pool and
+close() (request end, or database_sync_to_async's close_old_connections) hands it back, so the
+number of server connections is capped at SIZE + MAX_OVERFLOW no matter how many threads exist.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    """No connection became available within the pool's TIMEOUT."""
+
+
+class ConnectionPool:
+    """SIZE connections kept idle at most, MAX_OVERFLOW extra opened under load and closed on release.
+
+    Idle connections are reused LIFO so the hot ones stay warm; a connection older than RECYCLE
+    seconds is closed instead of being handed out again. One that sat idle for more than
+    PING_AFTER seconds is pinged first, so a server restart or a dropped socket costs a
+    reconnect rather than a failed request.
+    """
+
+    def __init__(self, name: str, size: int = 10, max_overflow: int = 5, timeout: float = 10.0, recycle: int = 1800,
+                 ping_after: float = 30.0):
+        self.name = name
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._cond = threading.Condition()
+        self._idle = []  # [(connection, opened_at, idle_since)]
+        self._in_use: Dict[int, float] = {}  # id(connection) -> opened_at
+        self._open = 0
+        self._waiting = 0
+        self._stats = {"created": 0, "timeouts": 0, "recycled": 0, "discarded": 0, "pings": 0, "wait_seconds": 0.0}
+
+    def acquire(self, connect: Callable, ping: Optional[Callable] = None):
+        """Return an idle connection, or open one with connect() while under SIZE + MAX_OVERFLOW.
+
+        ping(conn) must raise if the connection is dead; a connection that fails it is discarded
+        and the next one is tried, all within the same TIMEOUT.
+        """
+        start = time.monotonic()
+        while True:
+            conn, idle_for = self._checkout(connect, start)
+            if ping is None or idle_for <= self.ping_after:
+                return conn
+            with self._cond:
+                self._stats["pings"] += 1
+            try:
+                ping(conn)
+            except Exception:
+                self.release(conn, discard=True)
+                continue
+            return conn
+
+    def _checkout(self, connect: Callable, start: float) -> Tuple[object, float]:
+        """(connection, seconds it sat idle); new connections count as idle for 0 seconds."""
+        stale = []
+        try:
+            with self._cond:
+                while True:
+                    while self._idle:
+                        conn, opened_at, idle_since = self._idle.pop()
+                        if self.recycle and start - opened_at > self.recycle:
+                            self._open -= 1
+                            self._stats["recycled"] += 1
+                            stale.append(conn)
+                            continue
+                        self._in_use[id(conn)] = opened_at
+                        self._stats["wait_seconds"] += time.monotonic() - start
+                        return conn, time.monotonic() - idle_since
+                    if self._open < self.size + self.max_overflow:
+                        self._open += 1
+                        break
+                    remaining = start + self.timeout - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"connection pool {self.name!r} exhausted "
+                            f"({self.size}+{self.max_overflow} in use, waited {self.timeout}s)"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+        finally:
+            for conn in stale:
+                _close_quietly(conn)
+        # Open outside the lock; the slot is already reserved
+        try:
+            conn = connect()
+        except BaseException:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._in_use[id(conn)] = time.monotonic()
+            self._stats["created"] += 1
+            self._stats["wait_seconds"] += time.monotonic() - start
+        return conn, 0.0
+
+    def release(self, conn, discard: bool = False) -> None:
+        """Hand a connection back; overflow, broken (discard=True) and expired ones are closed."""
+        with self._cond:
+            opened_at = self._in_use.pop(id(conn), None)
+            if opened_at is None:
+                keep = False  # not ours, e.g. opened before the pool was swapped in
+            else:
+                expired = self.recycle and time.monotonic() - opened_at > self.recycle
+                keep = not discard and not expired and len(self._idle) < self.size
+                if keep:
+                    self._idle.append((conn, opened_at, time.monotonic()))
+                else:
+                    self._open -= 1
+                    if discard:
+                        self._stats["discarded"] += 1
+                    elif expired:
+                        self._stats["recycled"] += 1
+                self._cond.notify()
+        if not keep:
+            _close_quietly(conn)
+
+    def close_idle(self) -> int:
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _, _ in idle:
+            _close_quietly(conn)
+        return len(idle)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return dict(
+                self._stats,
+                size=self.size,
+                max_overflow=self.max_overflow,
+                open=self._open,
+                in_use=len(self._in_use),
+                idle=len(self._idle),
+                waiting=self._waiting,
+            )
+
+
+def _ping(conn) -> None:
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+    conn.rollback()
+
+
+def _close_quietly(conn) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, settings_dict: dict) -> ConnectionPool:
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                options = settings_dict.get("POOL") or {}
+                pool = _pools[alias] = ConnectionPool(
+                    alias,
+                    size=int(options.get("SIZE", 10)),
+                    max_overflow=int(options.get("MAX_OVERFLOW", 5)),
+                    timeout=float(options.get("TIMEOUT", 10.0)),
+                    recycle=int(options.get("RECYCLE", 1800)),
+                    ping_after=float(options.get("PING_AFTER", 30)),
+                )
+    return pool
+
+
+def pool_stats() -> Dict[str, dict]:
+    """{alias: stats} for every pool opened in this process."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+class PooledDatabaseWrapperMixin:
+    """Routes DatabaseWrapper.connect()/close() through the alias' ConnectionPool."""
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        return get_pool(self.alias, self.settings_dict).acquire(lambda: connect(conn_params), ping=_ping)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Anything that may have left the session in an unknown state is closed, not reused
+        discard = self.in_atomic_block or self.errors_occurred
+        if not discard:
+            try:
+                self.connection.rollback()
+            except Exception:
+                discard = True
+        get_pool(self.alias, self.settings_dict).release(self.connection, discard=discard)
@@ -0,0 +1,69 @@
+"""Read-replica routing (settings.DATABASE_ROUTERS when DATABASE_REPLICA_URLS is set).
+
+ReplicaRoutingMiddleware opens a per-request routing state; only safe-method requests from
+clients that are not pinned read from settings.REPLICA_DATABASES. Anything outside a request
+(commands, consumers, signals) and every read after a write in the same request go to the
+primary. A client that writes is pinned to the primary for REPLICA_STICKY_SECONDS so its next
+requests see its own writes despite replication lag.
+
+Pins live in the cache keyed by user, not in a cookie: the Flutter client doesn't keep cookies.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# {"replica": reads may use a replica, "wrote": a write was routed during the request}
+_state: ContextVar[Optional[dict]] = ContextVar("replica_routing", default=None)
+
+
+def _key(ident: str) -> str:
+    return f"rp:{ident}"
+
+
+def pin(ident: str) -> None:
+    cache.set(_key(ident), 1, timeout=getattr(settings, "REPLICA_STICKY_SECONDS", 10))
+
+
+def is_pinned(ident: str) -> bool:
+    return cache.get(_key(ident)) is not None
+
+
+@contextmanager
+def routing(replica: bool):
+    """Routing state for one request; yields the dict so the caller can see whether it wrote."""
+    state = {"replica": replica, "wrote": False}
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = getattr(settings, "REPLICA_DATABASES", [])
+        if state is not None and state["replica"] and replicas:
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Reads for the rest of this request must see the write
+            state["replica"] = False
+            state["wrote"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication (or a copied SQLite file locally)
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,63 @@
+import datetime
+import json
+import uuid
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; stdlib json is used without it
+    orjson = None
+
+_drf_default = JSONEncoder().default
+# datetimes go through DRF's encoder so both backends agree on "...Z" and millisecond formatting
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+def _escape_separators(data: bytes) -> bytes:
+    # DRF escapes U+2028/U+2029 so the output is also valid JavaScript
+    if b"\xe2\x80" in data:
+        data = data.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return data
+
+
+def _json_dumps(data) -> bytes:
+    # DRF JSONRenderer defaults: compact, UNICODE_JSON, STRICT_JSON
+    text = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    return _escape_separators(text.encode())
+
+
+# Types orjson writes exactly like DRF (datetimes are passed through to DRF's encoder)
+_ORJSON_SAFE = (str, int, type(None), datetime.date, datetime.time, datetime.timedelta, uuid.UUID)
+
+
+def _orjson_safe(obj) -> bool:
+    """False if anything in the payload could encode differently under orjson.
+
+    Floats are the main case: orjson writes 1e-6 / 1e16 / 0.000031 where json writes
+    1e-06 / 1e+16 / 3.1e-05, and NaN as null where DRF's strict encoder raises. Decimals are
+    turned into floats by DRF's encoder, and unknown types may be too, so both fall back.
+    """
+    if isinstance(obj, dict):
+        return all(_orjson_safe(k) and _orjson_safe(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return all(_orjson_safe(v) for v in obj)
+    return isinstance(obj, _ORJSON_SAFE) and not isinstance(obj, float)
+
+
+def dumps(data) -> bytes:
+    """Encode like rest_framework's JSONRenderer, byte for byte, with the backend chosen by settings.JSON_ENCODER.
+
+    Payloads orjson can't reproduce exactly (see _orjson_safe) always take the stdlib path.
+    """
+    if orjson is not None and getattr(settings, "JSON_ENCODER", "json") == "orjson" and _orjson_safe(data):
+        try:
+            return _escape_separators(orjson.dumps(data, default=_drf_default, option=_ORJSON_OPTIONS))
+        except TypeError:  # orjson.JSONEncodeError: >64-bit ints, NaN under strict mode, ...
+            pass
+    return _json_dumps(data)
+
+
+def dumps_str(data) -> str:
+    return dumps(data).decode()
@@ -0,0 +1,78 @@
+import time
+from typing import Iterable, List
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from . import encoding, metrics
+
+
+def trip_group(trip_id) -> str:
+    return f"trip_{trip_id}"
+
+
+def encode_frame(data) -> str:
+    return encoding.dumps_str(data)
+
+
+def batch_frame(frames: List[str]) -> str:
+    # Splices already-encoded frames, so coalescing never re-serializes an event
+    return '{"type":"batch","events":[' + ",".join(frames) + "]}"
+
+
+def chat_message_payload(message, sender) -> dict:
+    return {
+        "id": message.id,
+        "trip": message.trip_id,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+        "sender": {"id": sender.id, "username": sender.get_username()},
+    }
+
+
+def chat_event(message, sender) -> dict:
+    """Channel-layer event for a new chat message.
+
+    The client frame is encoded once here by the publisher; every socket in the group
+    forwards the same string instead of encoding it per subscriber.
+    """
+    payload = chat_message_payload(message, sender)
+    return {"type": "chat.message", "id": payload["id"], "frame": encode_frame({"type": "chat", "message": payload})}
+
+
+def publish(trip_id, data: dict) -> None:
+    """Send a typed delta frame to every socket on the trip once the current transaction commits."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    event = {"type": "trip.event", "frame": encode_frame(data)}
+    transaction.on_commit(lambda: group_send_sync(trip_id, event, data["type"]))
+
+
+def group_send_sync(trip_id, event: dict, kind: str) -> None:
+    channel_layer = get_channel_layer()
+    start = time.perf_counter()
+    async_to_sync(channel_layer.group_send)(trip_group(trip_id), event)
+    metrics.observe("channel_layer_send_seconds", time.perf_counter() - start, event=kind)
+
+
+def publish_itinerary_updated(item, action: str) -> None:
+    from .serializers import ItineraryItemSerializer
+
+    body = {"id": item.id} if action == "deleted" else ItineraryItemSerializer(item).data
+    publish(item.trip_id, {"type": "itinerary.updated", "trip": item.trip_id, "action": action, "item": body})
+
+
+def publish_itinerary_reordered(trip_id, items: Iterable) -> None:
+    order = [{"id": item.id, "order": item.order} for item in items]
+    if order:
+        publish(trip_id, {"type": "itinerary.reordered", "trip": trip_id, "items": order})
+
+
+def publish_poll_tally(poll) -> None:
+    from .models import PollOption
+
+    counts = PollOption.objects.filter(poll=poll).order_by("id").values_list("id", "vote_count")
+    options = [{"id": oid, "votes_count": total} for oid, total in counts]
+    publish(poll.trip_id, {"type": "poll.tally", "trip": poll.trip_id, "poll": poll.id, "options": options})
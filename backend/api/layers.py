@@ -0,0 +1,22 @@
+from channels.layers import InMemoryChannelLayer
+
+
+# location -> (channels, groups), shared by every layer instance in this process
+_shared_state = {}
+
+
+class SharedInMemoryChannelLayer(InMemoryChannelLayer):
+    """In-process stand-in for a Redis channel layer.
+
+    Every instance configured with the same ``location`` shares channels and groups, so two
+    ASGI app instances (each with their own ChannelLayerManager) behave like two workers
+    talking through one shared backend. Not for production: nothing leaves the process.
+    """
+
+    def __init__(self, location="default", **kwargs):
+        super().__init__(**kwargs)
+        self.channels, self.groups = _shared_state.setdefault(location, ({}, {}))
+
+    async def flush(self):
+        self.channels.clear()
+        self.groups.clear()
@@ -0,0 +1,57 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+class JSONLineFormatter(logging.Formatter):
+    """Dict messages become one compact JSON line; anything else is written as its message."""
+
+    def __init__(self):
+        super().__init__("%(message)s")
+
+    def format(self, record):
+        if isinstance(record.msg, dict):
+            return json.dumps(record.msg, separators=(",", ":"), default=str)
+        return super().format(record)
+
+
+class BackgroundStreamHandler(QueueHandler):
+    """Hands records to a queue; a background QueueListener thread formats and writes them.
+
+    The request thread only pays for a queue put. Dict messages (e.g. the request summary
+    from RequestResponseLoggingMiddleware) are JSON-encoded on the listener thread.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(JSONLineFormatter())
+        self.listener = QueueListener(self.queue, target, respect_handler_level=False)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Write out everything queued and stop the writer thread; a no-op once stopped."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def prepare(self, record):
+        # Skip QueueHandler's format()/copy; dicts are built per call, so they travel as they are
+        if isinstance(record.msg, dict) and not record.exc_info:
+            return record
+        message = record.getMessage()
+        if record.exc_info:
+            message = f"{message}\n{logging.Formatter().formatException(record.exc_info)}"
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # drop rather than block the request under log back-pressure
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.archive import archive_trip, candidate_trips
+
+
+class Command(BaseCommand):
+    help = 'Moves old chat messages (and all messages of ended trips) into the compressed archive tier'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, help='Overrides CHAT_ARCHIVE_AFTER_DAYS')
+        parser.add_argument('--ended-days', type=int, help='Overrides CHAT_ARCHIVE_ENDED_TRIP_DAYS')
+        parser.add_argument('--chunk-size', type=int, help='Overrides CHAT_ARCHIVE_CHUNK_SIZE')
+        parser.add_argument('--max-trips', type=int, help='Stop after this many trips (spread work across runs)')
+
+    def handle(self, *args, **options):
+        trips = moved = 0
+        for trip_id, cutoff in candidate_trips(after_days=options['older_than_days'], ended_days=options['ended_days']):
+            if options['max_trips'] is not None and trips >= options['max_trips']:
+                break
+            count = archive_trip(trip_id, cutoff, chunk_size=options['chunk_size'])
+            trips += 1
+            moved += count
+            if count:
+                self.stdout.write(f"trip {trip_id}: archived {count} messages{' (trip ended)' if cutoff is None else ''}")
+        self.stdout.write(self.style.SUCCESS(f'✓ Archived {moved} messages from {trips} trips'))
@@ -0,0 +1,31 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from api.benchmarks import FanoutConsumer, PerSocketEncodeConsumer, run_fanout
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks WebSocket fan-out (N sockets x M msgs/sec) and reports delivery latency and CPU per mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=200)
+        parser.add_argument('--rate', type=int, default=50, help='Messages per second published to the group')
+        parser.add_argument('--duration', type=float, default=5.0)
+        parser.add_argument('--window-ms', type=int, default=5, help='Batching window for the coalesced mode')
+
+    def handle(self, *args, **options):
+        modes = [
+            ('per-socket-encode', PerSocketEncodeConsumer, 0),
+            ('shared-frame', FanoutConsumer, 0),
+            (f"shared-frame+batch({options['window_ms']}ms)", FanoutConsumer, options['window_ms']),
+        ]
+        self.stdout.write('mode                          sockets  sent  delivered  frames  p50_ms  p99_ms  cpu_s')
+        for name, consumer, window in modes:
+            with override_settings(WS_BATCH_WINDOW_MS=window):
+                r = asyncio.run(run_fanout(consumer, options['sockets'], options['rate'], options['duration']))
+            self.stdout.write(
+                f"{name:<29} {options['sockets']:>7} {r['sent']:>5} {r['delivered']:>10} {r['frames']:>7}"
+                f" {r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f} {r['cpu_s']:>6.2f}"
+            )
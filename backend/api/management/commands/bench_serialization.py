@@ -0,0 +1,87 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api import encoding, rows
+from api.models import ChatMessage, ItineraryItem
+from api.renderers import FastJSONRenderer
+from api.serializers import ChatMessageSerializer, ItineraryItemSerializer
+
+# Values that trip up encoders: non-ASCII, JS line separators, control chars, escapes, floats
+_EDGE_CASES = [
+    {"text": "Café ☕ 東京 🇯🇵", "n": 1, "none": None, "flag": True},
+    {"text": "line\u2028break\u2029para", "ctrl": "\x00\x1f\t\n\r\b\f", "quote": "\"\\/"},
+    {"nested": [{"a": [1, 2, {"b": "c"}]}, [], {}], "big": 2 ** 53, "neg": -1},
+    # Floats: orjson's own formatting differs (1e-6 vs 1e-06, 1e16 vs 1e+16, 0.000031 vs 3.1e-05)
+    {"small": 1e-6, "large": 1e16, "tiny": 0.000031, "rank": [0.0607927, 1.5, -0.0, 1e300], 1.5: "key"},
+    {"price": Decimal("12.50"), "ratio": Decimal("1E-7")},
+    # DRF's strict encoder refuses these; the fast path must too, not write null
+    {"nan": float("nan")},
+    {"inf": [float("inf")]},
+]
+
+
+def _outcome(render, sample):
+    try:
+        return render(sample)
+    except ValueError as exc:
+        return type(exc)
+
+
+class Command(BaseCommand):
+    help = 'Compares ModelSerializer + JSONRenderer with .values() rows + FastJSONRenderer and checks the bytes match'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Rows per endpoint (from the current DB, e.g. after seed_bench_data)')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        for sample in _EDGE_CASES:
+            for backend in ('orjson', 'json'):
+                with override_settings(JSON_ENCODER=backend):
+                    if _outcome(encoding.dumps, sample) != _outcome(JSONRenderer().render, sample):
+                        raise CommandError(f'{backend} encoder output differs from JSONRenderer for {sample!r}')
+
+        n = options['rows']
+        cases = [
+            (
+                'itinerary',
+                ItineraryItemSerializer,
+                lambda: list(ItineraryItem.objects.order_by('trip_id', 'order', 'id')[:n]),
+                lambda: list(ItineraryItem.objects.order_by('trip_id', 'order', 'id').values(*rows.ITINERARY_VALUES)[:n]),
+                rows.itinerary_rows,
+            ),
+            (
+                'chat',
+                ChatMessageSerializer,
+                lambda: list(ChatMessage.objects.select_related('sender').order_by('trip_id', 'created_at', 'id')[:n]),
+                lambda: list(ChatMessage.objects.order_by('trip_id', 'created_at', 'id').values(*rows.CHAT_VALUES)[:n]),
+                rows.chat_rows,
+            ),
+        ]
+        self.stdout.write(f"encoder backend: {'orjson' if encoding.orjson else 'json (orjson not installed)'}")
+        self.stdout.write('endpoint    rows  fetch_obj_ms  fetch_values_ms  serializer+drf_ms  serializer+fast_ms  values+fast_ms  speedup')
+        for name, serializer_class, fetch_objects, fetch_values, build_rows in cases:
+            t_objects, objects = self._time(fetch_objects, 1)
+            t_values, values = self._time(fetch_values, 1)
+            baseline = JSONRenderer().render(serializer_class(objects, many=True).data)
+            fast = FastJSONRenderer().render(build_rows(values))
+            if baseline != fast:
+                raise CommandError(f'{name}: fast output is not byte-identical to {serializer_class.__name__}')
+            t_old, _ = self._time(lambda: JSONRenderer().render(serializer_class(objects, many=True).data), options['repeat'])
+            t_mid, _ = self._time(lambda: FastJSONRenderer().render(serializer_class(objects, many=True).data), options['repeat'])
+            t_new, _ = self._time(lambda: FastJSONRenderer().render(build_rows(values)), options['repeat'])
+            self.stdout.write(
+                f'{name:<10} {len(objects):>5} {t_objects:>13.2f} {t_values:>16.2f} {t_old:>18.2f} {t_mid:>19.2f}'
+                f' {t_new:>15.2f} {t_old / t_new if t_new else 0:>7.1f}x'
+            )
+        self.stdout.write(self.style.SUCCESS('✓ Outputs are byte-identical'))
+
+    def _time(self, fn, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        return (time.perf_counter() - start) * 1000 / repeat, result
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.voting import reconcile_vote_counts
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized PollOption.vote_count column from Vote rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', type=int, help='Only reconcile this poll')
+
+    def handle(self, *args, **options):
+        updated = reconcile_vote_counts(options.get('poll'))
+        self.stdout.write(self.style.SUCCESS(f'✓ Reconciled vote counts for {updated} options'))
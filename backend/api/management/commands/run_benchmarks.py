@@ -0,0 +1,63 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import SCENARIOS, compare, dump_report, run_scenarios
+
+ALL_SCENARIOS = list(SCENARIOS) + ['ws_fanout']
+
+
+def _cell(value):
+    return f'{value:>8.2f}' if isinstance(value, (int, float)) else f"{'-':>8}"
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the scripted benchmark scenarios against the seeded dataset and writes a JSON report. '
+        'Point DATABASE_URL at Postgres to benchmark it instead of SQLite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=ALL_SCENARIOS, help='Repeatable; default is all')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--sockets', type=int, default=100, help='ws_fanout sockets')
+        parser.add_argument('--rate', type=int, default=100, help='ws_fanout messages per second')
+        parser.add_argument('--duration', type=float, default=2.0, help='ws_fanout seconds')
+        parser.add_argument('--output', help='Write the report here (e.g. bench/<commit>.json)')
+        parser.add_argument('--compare', help='Baseline report to diff against')
+        parser.add_argument('--threshold', type=float, default=10.0, help='Latency growth (%%) flagged as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            report = run_scenarios(
+                options['scenario'] or ALL_SCENARIOS,
+                options['iterations'],
+                options['warmup'],
+                fanout={'sockets': options['sockets'], 'rate': options['rate'], 'duration': options['duration']},
+            )
+        except LookupError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write('scenario              p50_ms   p95_ms   p99_ms  queries')
+        for name, r in sorted(report['scenarios'].items()):
+            cells = [_cell(r.get(k)) for k in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request')]
+            self.stdout.write(f"{name:<20} " + ' '.join(cells))
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(dump_report(report))
+            self.stdout.write(self.style.SUCCESS(f"✓ Report written to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as fh:
+                baseline = json.load(fh)
+            rows = compare(baseline, report, options['threshold'])
+            self.stdout.write(f"\nvs {options['compare']} ({baseline.get('meta', {}).get('commit', '?')})")
+            for row in rows:
+                flag = '  REGRESSION' if row['regression'] else ''
+                self.stdout.write(
+                    f"{row['scenario']:<20} {row['metric']:<20} {row['old']:>9} -> {row['new']:>9} ({row['delta_pct']:+.1f}%){flag}"
+                )
+            if options['fail_on_regression'] and any(r['regression'] for r in rows):
+                raise CommandError('Benchmark regression against baseline')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import reset, seed
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generates a deterministic benchmark dataset (e.g. --users 100000 --items 1000000 --messages 10000000)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--trips', type=int, default=500)
+        parser.add_argument('--items', type=int, default=10000, help='Itinerary items, spread round-robin over trips')
+        parser.add_argument('--messages', type=int, default=100000, help='Chat messages, spread round-robin over trips')
+        parser.add_argument('--polls', type=int, default=1000)
+        parser.add_argument('--options-per-poll', type=int, default=4)
+        parser.add_argument('--votes-per-poll', type=int, default=10)
+        parser.add_argument('--collaborators-per-trip', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1, help='Same seed, same dataset')
+        parser.add_argument('--reset', action='store_true', help='Delete existing bench data first')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            self.stdout.write(f'Deleted {reset()} bench rows')
+        counts = seed(
+            users=options['users'],
+            trips=options['trips'],
+            items=options['items'],
+            messages=options['messages'],
+            polls=options['polls'],
+            options_per_poll=options['options_per_poll'],
+            votes_per_poll=options['votes_per_poll'],
+            collaborators_per_trip=options['collaborators_per_trip'],
+            batch_size=options['batch_size'],
+            seed_value=options['seed'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ Seeded {sum(counts.values())} rows'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.outbox import deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued emails from the outbox in batches over a reused mail connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the outbox is drained')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep between polls when idle')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                result = deliver_batch(options['batch_size'])
+            except Exception as exc:  # mail server down etc.: rows stay pending, try again later
+                self.stderr.write(f'Outbox batch failed: {exc}')
+                result = None
+            if result and any(result.values()):
+                self.stdout.write(f"sent={result['sent']} retried={result['retried']} failed={result['failed']}")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import run_soak
+
+
+class Command(BaseCommand):
+    help = (
+        'Soaks the seeded bench trip with mixed HTTP and WebSocket load through the ASGI app and checks '
+        'that DB connections stay within the pool bounds. Run with DB_POOL=True.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=30.0)
+        parser.add_argument('--http-workers', type=int, default=16, help='Concurrent HTTP request loops')
+        parser.add_argument('--sockets', type=int, default=16, help='WebSockets sending chat messages')
+        parser.add_argument('--ws-interval', type=float, default=0.05, help='Seconds between sends per socket')
+        parser.add_argument('--output', help='Write the JSON report here')
+
+    def handle(self, *args, **options):
+        try:
+            report = run_soak(options['duration'], options['http_workers'], options['sockets'], options['ws_interval'])
+        except LookupError as exc:
+            raise CommandError(str(exc))
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+        self.stdout.write(
+            f"{report['http_requests']} HTTP requests ({report['http_errors']} errors), "
+            f"{report['ws_messages']} WS messages in {report['duration_s']}s; "
+            f"{report['checkouts']} connection checkouts across {report['threads']} threads"
+        )
+        if not report['pools']:
+            self.stdout.write(self.style.WARNING('DB_POOL is off: no pool to check, connections are per thread'))
+            return
+        for alias, pool in report['pools'].items():
+            self.stdout.write(
+                f"{alias}: peak {pool['peak_open']} open / {pool['size']}+{pool['max_overflow']} allowed, "
+                f"peak {pool['peak_waiting']} waiting, {pool['created']} opened, {pool['timeouts']} timeouts, "
+                f"{pool['open_after']} open after"
+            )
+        failed = report['http_errors'] or report['ws_refused'] or report['ws_errors']
+        if failed or not all(p['bounded'] for p in report['pools'].values()):
+            raise CommandError('Soak failed: pool exceeded its bounds or requests errored')
+        self.stdout.write(self.style.SUCCESS('✓ Connection count stayed within the pool bounds'))
@@ -0,0 +1,62 @@
+import threading
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Trip, TripCollaborator
+
+
+OWNER = "owner"
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _key(user_id: int) -> str:
+    return f"tm:{user_id}"
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def trip_roles(user_id: int) -> Dict[int, str]:
+    """Return {trip_id: role} for every trip the user owns or collaborates on.
+
+    Filled lazily from the DB on a miss and invalidated by the signals in api.signals.
+    """
+    key = _key(user_id)
+    roles = cache.get(key)
+    if roles is not None:
+        _count("hits")
+        return roles
+    _count("misses")
+    # Filled from the primary: a lagging replica read would stay cached until the next invalidation
+    roles = {
+        tid: role
+        for tid, role in TripCollaborator.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user_id).values_list("trip_id", "role")
+    }
+    for tid in Trip.objects.using(DEFAULT_DB_ALIAS).filter(owner_id=user_id).values_list("id", flat=True):
+        roles[tid] = OWNER
+    cache.set(key, roles, timeout=getattr(settings, "TRIP_MEMBERSHIP_CACHE_TTL", 300))
+    return roles
+
+
+def trip_role(user_id: int, trip_id: int) -> Optional[str]:
+    return trip_roles(user_id).get(int(trip_id))
+
+
+def is_member(user_id: int, trip_id: int) -> bool:
+    return trip_role(user_id, trip_id) is not None
+
+
+def invalidate(*user_ids: int) -> None:
+    cache.delete_many([_key(uid) for uid in user_ids if uid is not None])
+
+
+def cache_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
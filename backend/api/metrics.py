@@ -0,0 +1,120 @@
+import bisect
+import threading
+from typing import Dict, Tuple
+
+from . import dbpool, membership
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_lock = threading.Lock()
+# name -> (type, help); series keyed by (name, labels)
+_meta: Dict[str, Tuple[str, str]] = {}
+_counters: Dict[tuple, float] = {}
+_gauges: Dict[tuple, float] = {}
+_histograms: Dict[tuple, list] = {}  # [bucket counts..., sum, count]
+_buckets: Dict[str, tuple] = {}
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def describe(name: str, kind: str, help_text: str, buckets: tuple = None) -> None:
+    _meta[name] = (kind, help_text)
+    if buckets is not None:
+        _buckets[name] = buckets
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def gauge_add(name: str, value: float, **labels) -> None:
+    key = (name, _labels(labels))
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    buckets = _buckets[name]
+    key = (name, _labels(labels))
+    idx = bisect.bisect_left(buckets, value)
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(buckets) + 2)
+        if idx < len(buckets):
+            series[idx] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+def _fmt_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    """Prometheus text exposition format (per process)."""
+    stats = membership.cache_stats()
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+    counters[("trip_membership_cache_hits_total", ())] = stats["hits"]
+    counters[("trip_membership_cache_misses_total", ())] = stats["misses"]
+    for alias, pool in dbpool.pool_stats().items():
+        db = (("alias", alias),)
+        gauges[("db_pool_connections", db + (("state", "in_use"),))] = pool["in_use"]
+        gauges[("db_pool_connections", db + (("state", "idle"),))] = pool["idle"]
+        gauges[("db_pool_waiting", db)] = pool["waiting"]
+        gauges[("db_pool_max_connections", db)] = pool["size"] + pool["max_overflow"]
+        counters[("db_pool_connections_created_total", db)] = pool["created"]
+        counters[("db_pool_acquire_timeouts_total", db)] = pool["timeouts"]
+        counters[("db_pool_acquire_wait_seconds_total", db)] = pool["wait_seconds"]
+
+    lines = []
+    for name, (kind, help_text) in sorted(_meta.items()):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            buckets = _buckets[name]
+            for (series_name, labels), series in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets, series):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_fmt_labels(labels, (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_bucket{_fmt_labels(labels, (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {series[-2]}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {series[-1]}")
+        else:
+            source = counters if kind == "counter" else gauges
+            for (series_name, labels), value in sorted(source.items()):
+                if series_name == name:
+                    lines.append(f"{name}{_fmt_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+describe("http_request_duration_seconds", "histogram", "HTTP request latency by route", LATENCY_BUCKETS)
+describe("http_requests_total", "counter", "HTTP requests by route, method and status class")
+describe("http_db_queries", "histogram", "DB queries per HTTP request by route", QUERY_COUNT_BUCKETS)
+describe("http_db_seconds_total", "counter", "Time spent in DB queries by route")
+describe("ws_connections", "gauge", "Open trip WebSocket connections")
+describe("ws_connections_total", "counter", "Accepted trip WebSocket connections")
+describe("channel_layer_send_seconds", "histogram", "Channel layer group_send latency by event type", LATENCY_BUCKETS)
+describe("trip_membership_cache_hits_total", "counter", "Trip membership cache hits")
+describe("trip_membership_cache_misses_total", "counter", "Trip membership cache misses")
+describe("db_pool_connections", "gauge", "Pooled DB connections by state (in_use/idle)")
+describe("db_pool_waiting", "gauge", "Threads waiting for a pooled DB connection")
+describe("db_pool_max_connections", "gauge", "Pool size plus overflow")
+describe("db_pool_connections_created_total", "counter", "DB connections opened by the pool")
+describe("db_pool_acquire_timeouts_total", "counter", "Pool checkouts that gave up after DB_POOL_TIMEOUT")
+describe("db_pool_acquire_wait_seconds_total", "counter", "Time spent checking connections out of the pool")
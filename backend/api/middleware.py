@@ -1,65 +1,151 @@
-import json
 import logging
+import random
 import time
 from typing import Callable
 
-from django.core.cache import cache
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.http import JsonResponse
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import dbrouter, metrics
+from .dbpool import PoolTimeout
+from .dbstats import count_queries
+from .ratelimit import SlidingWindowLimiter, parse_rate, user_ident
 
 
 logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("api.requests")
 
 
 class RequestResponseLoggingMiddleware:
+    """One JSON line per request, with DB query count/time.
+
+    Successful fast requests are sampled (REQUEST_LOG_SAMPLE_RATE); 4xx/5xx and requests
+    slower than REQUEST_LOG_SLOW_MS are always logged. The record carries a dict; encoding
+    and writing happen off-thread in api.logqueue.BackgroundStreamHandler (see settings.LOGGING).
+    Queries are counted by MetricsMiddleware when it runs (request.db_queries), else here.
+    """
+
     def __init__(self, get_response: Callable):
         self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_LOG_SAMPLE_RATE", 1.0)
+        self.slow_ms = getattr(settings, "REQUEST_LOG_SLOW_MS", 500)
 
     def __call__(self, request):
-        start = time.time()
-        response = self.get_response(request)
-        duration = (time.time() - start) * 1000
+        start = time.perf_counter()
+        queries = getattr(request, "db_queries", None)
+        if queries is None:
+            with count_queries() as queries:
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        duration = (time.perf_counter() - start) * 1000
+        status = getattr(response, "status_code", None) or 0
+        if status < 400 and duration < self.slow_ms and random.random() >= self.sample_rate:
+            return response
         user_id = getattr(getattr(request, "user", None), "id", None)
-        logger.info(
-            json.dumps(
-                {
-                    "method": request.method,
-                    "path": request.path,
-                    "status": getattr(response, "status_code", None),
-                    "ms": round(duration, 2),
-                    "user": user_id,
-                }
-            )
-        )
+        request_logger.info({
+            "method": request.method,
+            "path": request.path,
+            "status": status,
+            "ms": round(duration, 2),
+            "user": user_id,
+            "db_queries": queries.count,
+            "db_ms": round(queries.seconds * 1000, 2),
+        })
         return response
 
 
+class MetricsMiddleware:
+    """Per-route latency and DB query histograms for /api/metrics (disable with METRICS_ENABLED=False)."""
+
+    def __init__(self, get_response: Callable):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "METRICS_ENABLED", True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        start = time.perf_counter()
+        with count_queries() as queries:
+            # Shared with RequestResponseLoggingMiddleware so each query is wrapped once
+            request.db_queries = queries
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = getattr(request, "resolver_match", None)
+        route = (match.url_name or match.route) if match else "unmatched"
+        status = getattr(response, "status_code", 0) or 0
+        metrics.observe("http_request_duration_seconds", duration, route=route, method=request.method)
+        metrics.inc("http_requests_total", route=route, method=request.method, status=f"{status // 100}xx")
+        metrics.observe("http_db_queries", queries.count, route=route)
+        metrics.inc("http_db_seconds_total", queries.seconds, route=route)
+        return response
+
+
+def client_ident(request) -> str:
+    """User id from a valid JWT (signature check only, no DB), falling back to the IP."""
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    if header.startswith("Bearer "):
+        try:
+            token = AccessToken(header[7:])
+            return user_ident(token[jwt_settings.USER_ID_CLAIM])
+        except (TokenError, KeyError):
+            pass
+    return request.META.get("REMOTE_ADDR", "anon")
+
+
 class RateLimitMiddleware:
-    """Simple sliding-window rate limiter per IP (and user when authenticated)."""
+    """Sliding-window rate limiter with per-route budgets (settings.RATE_LIMITS).
+
+    Runs in process_view so the resolved route name is known. Clients are keyed by the
+    user id from a valid JWT (signature check only, no DB), falling back to the IP.
+    """
 
-    def __init__(self, get_response: Callable, limit: int = 120, window: int = 60):
+    def __init__(self, get_response: Callable):
         self.get_response = get_response
-        self.limit = limit
-        self.window = window
+        self.limiter = SlidingWindowLimiter()
+        self.rates = {name: parse_rate(rate) for name, rate in getattr(settings, "RATE_LIMITS", {}).items()}
+        self.rates.setdefault("default", (120, 60))
 
     def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
         try:
-            ident = request.META.get("REMOTE_ADDR", "anon")
-            if getattr(request, "user", None) and request.user.is_authenticated:
-                ident = f"u:{request.user.id}"
-            key = f"rl:{ident}:{int(time.time() // self.window)}"
-            count = cache.get(key)
-            if count is None:
-                cache.set(key, 1, timeout=self.window + 1)
-            else:
-                if count >= self.limit:
-                    return JsonResponse({"detail": "Rate limit exceeded"}, status=429)
-                try:
-                    cache.incr(key)
-                except Exception:
-                    cache.set(key, count + 1, timeout=self.window + 1)
+            route = request.resolver_match.url_name if request.resolver_match else None
+            budget = f"{route}:{request.method}"
+            if budget not in self.rates:
+                budget = route if route in self.rates else "default"
+            limit, window = self.rates[budget]
+            allowed, retry_after = self.limiter.hit(f"{budget}:{client_ident(request)}", limit, window)
+            if not allowed:
+                response = JsonResponse({"detail": "Rate limit exceeded"}, status=429)
+                response["Retry-After"] = str(retry_after)
+                return response
         except Exception:  # fail open
             pass
-        return self.get_response(request)
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Lets safe-method requests read from replicas (api.dbrouter); pins writers to the primary."""
+
+    def __init__(self, get_response: Callable):
+        if not getattr(settings, "REPLICA_DATABASES", None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        ident = client_ident(request)
+        safe = request.method in ("GET", "HEAD", "OPTIONS")
+        with dbrouter.routing(replica=safe and not dbrouter.is_pinned(ident)) as state:
+            response = self.get_response(request)
+        if state["wrote"] or not safe:
+            dbrouter.pin(ident)
+        return response
 
 
 class GlobalExceptionMiddleware:
@@ -72,3 +158,12 @@ class GlobalExceptionMiddleware:
         except Exception as exc:
             logger.exception("Unhandled error")
             return JsonResponse({"detail": "Internal server error"}, status=500)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, PoolTimeout):
+            # Saturated pool: ask the client to back off instead of reporting a server error
+            logger.warning("DB pool exhausted on %s", request.path)
+            response = JsonResponse({"detail": "Server busy, retry shortly"}, status=503)
+            response["Retry-After"] = "1"
+            return response
+        return None
@@ -0,0 +1,12 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(model_name='poll', index=models.Index(fields=['trip', 'created_at'], name='api_poll_trip_id_0ddb34_idx')),
+    ]
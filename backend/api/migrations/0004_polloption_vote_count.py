@@ -0,0 +1,26 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_counts(apps, schema_editor):
+    PollOption = apps.get_model('api', 'PollOption')
+    Vote = apps.get_model('api', 'Vote')
+    counts = Vote.objects.filter(option=OuterRef('pk')).order_by().values('option').annotate(c=Count('id')).values('c')
+    PollOption.objects.update(vote_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='polloption',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vote_counts, migrations.RunPython.noop),
+    ]
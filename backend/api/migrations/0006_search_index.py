@@ -0,0 +1,82 @@
+from django.db import migrations
+
+# Postgres maintains GIN expression indexes itself; api.search queries the same expressions.
+POSTGRES_FORWARD = [
+    "CREATE INDEX IF NOT EXISTS api_chatmessage_search_gin ON api_chatmessage "
+    "USING gin (to_tsvector('simple', content))",
+    "CREATE INDEX IF NOT EXISTS api_itineraryitem_search_gin ON api_itineraryitem "
+    "USING gin (to_tsvector('simple', title || ' ' || description))",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS api_chatmessage_search_gin",
+    "DROP INDEX IF EXISTS api_itineraryitem_search_gin",
+]
+
+# SQLite: external-content FTS5 tables kept in step by triggers, so bulk_create and raw
+# writes are indexed too. Each write touches only its own row in the index.
+# A later migration that makes Django rebuild api_chatmessage or api_itineraryitem on SQLite
+# (most AlterField/RemoveField) drops these triggers with the old table: re-create them and
+# 'rebuild' the FTS5 table in that migration. api.search.indexed() falls back to unindexed
+# matching, with a warning, while any trigger is missing.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE api_chatmessage_fts USING fts5(content, content='api_chatmessage', content_rowid='id')",
+    "CREATE TRIGGER api_chatmessage_fts_ai AFTER INSERT ON api_chatmessage BEGIN "
+    "INSERT INTO api_chatmessage_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER api_chatmessage_fts_ad AFTER DELETE ON api_chatmessage BEGIN "
+    "INSERT INTO api_chatmessage_fts(api_chatmessage_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER api_chatmessage_fts_au AFTER UPDATE OF content ON api_chatmessage BEGIN "
+    "INSERT INTO api_chatmessage_fts(api_chatmessage_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO api_chatmessage_fts(rowid, content) VALUES (new.id, new.content); END",
+    "INSERT INTO api_chatmessage_fts(api_chatmessage_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE api_itineraryitem_fts USING fts5(title, description, content='api_itineraryitem', content_rowid='id')",
+    "CREATE TRIGGER api_itineraryitem_fts_ai AFTER INSERT ON api_itineraryitem BEGIN "
+    "INSERT INTO api_itineraryitem_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER api_itineraryitem_fts_ad AFTER DELETE ON api_itineraryitem BEGIN "
+    "INSERT INTO api_itineraryitem_fts(api_itineraryitem_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER api_itineraryitem_fts_au AFTER UPDATE OF title, description ON api_itineraryitem BEGIN "
+    "INSERT INTO api_itineraryitem_fts(api_itineraryitem_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO api_itineraryitem_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "INSERT INTO api_itineraryitem_fts(api_itineraryitem_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_ai",
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_ad",
+    "DROP TRIGGER IF EXISTS api_chatmessage_fts_au",
+    "DROP TABLE IF EXISTS api_chatmessage_fts",
+    "DROP TRIGGER IF EXISTS api_itineraryitem_fts_ai",
+    "DROP TRIGGER IF EXISTS api_itineraryitem_fts_ad",
+    "DROP TRIGGER IF EXISTS api_itineraryitem_fts_au",
+    "DROP TABLE IF EXISTS api_itineraryitem_fts",
+]
+
+
+def _fts5_available(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor == 'sqlite' and not _fts5_available(connection):
+            return  # api.search falls back to unindexed matching
+        for sql in statements_by_vendor.get(connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_trip_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
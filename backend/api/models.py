@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class TimeStampedModel(models.Model):
@@ -18,6 +19,8 @@ class Trip(TimeStampedModel):
     end_date = models.DateField(null=True, blank=True)
 
     collaborators = models.ManyToManyField(settings.AUTH_USER_MODEL, through="TripCollaborator", related_name="trips")
+    # Bumped (with updated_at) on every write to the trip's itinerary, polls, votes and collaborators; see api.versions
+    version = models.PositiveIntegerField(default=0)
 
     class Meta:
         indexes = [
@@ -61,6 +64,9 @@ class Poll(TimeStampedModel):
     question = models.CharField(max_length=255)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="created_polls")
 
+    class Meta:
+        indexes = [models.Index(fields=["trip", "created_at"])]
+
     def __str__(self):
         return self.question
 
@@ -68,6 +74,8 @@ class Poll(TimeStampedModel):
 class PollOption(TimeStampedModel):
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name="options")
     text = models.CharField(max_length=255)
+    # Materialized tally, maintained by api.voting.cast_vote; rebuild with `manage.py reconcile_vote_counts`
+    vote_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ("poll", "text")
@@ -92,6 +100,21 @@ class ChatMessage(TimeStampedModel):
         indexes = [models.Index(fields=["trip", "created_at", "id"])]
 
 
+# Cold chat tier (api.archive): a trip's oldest messages as zlib-compressed JSON rows, ordered
+# by (created_at, id) and always older than anything still in ChatMessage for that trip
+class ChatArchiveChunk(TimeStampedModel):
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name="chat_archive")
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    min_id = models.BigIntegerField()
+    max_id = models.BigIntegerField()
+    message_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        indexes = [models.Index(fields=["trip", "last_at"])]
+
+
 class TripInvite(TimeStampedModel):
     trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name="invites")
     email = models.EmailField()
@@ -100,3 +123,29 @@ class TripInvite(TimeStampedModel):
 
     class Meta:
         indexes = [models.Index(fields=["trip", "email"])]
+
+
+# Durable mail queue: rows are written in the request transaction and drained by `manage.py send_outbox`
+class OutboundEmail(TimeStampedModel):
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    )
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+
+# Bumped to revoke every JWT issued to the user (api.authentication.revoke_tokens); no row means version 0
+class TokenVersion(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="token_version")
+    version = models.PositiveIntegerField(default=0)
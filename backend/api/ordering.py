@@ -0,0 +1,96 @@
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from . import versions
+from .models import ItineraryItem
+
+
+def _gap() -> int:
+    # Spacing between consecutive order keys; 1 keeps dense 0..n-1 numbering, larger values
+    # leave room so a single move can usually take the midpoint and write one row.
+    return max(1, int(getattr(settings, "ITINERARY_ORDER_GAP", 1024)))
+
+
+def next_order(trip) -> int:
+    """Order key that places a new item after every existing one."""
+    last = ItineraryItem.objects.filter(trip=trip).aggregate(last=Max("order"))["last"]
+    return 0 if last is None else last + _gap()
+
+
+def _locked_items(trip) -> List[ItineraryItem]:
+    return list(ItineraryItem.objects.select_for_update().filter(trip=trip).order_by("order", "id").only("id", "order"))
+
+
+def _renumber(trip, items: List[ItineraryItem]) -> List[ItineraryItem]:
+    gap = _gap()
+    changed = []
+    for idx, item in enumerate(items):
+        if item.order != idx * gap:
+            item.order = idx * gap
+            changed.append(item)
+    if changed:
+        ItineraryItem.objects.bulk_update(changed, ["order"])
+        versions.bump(trip.id)  # bulk_update sends no post_save
+    return changed
+
+
+def apply_order(trip, ordered_ids: Iterable[int]) -> List[ItineraryItem]:
+    """Apply a full ordering in one bulk UPDATE and return the rows that changed.
+
+    Items not listed keep their relative order after the listed ones.
+    """
+    with transaction.atomic():
+        items = _locked_items(trip)
+        by_id = {item.id: item for item in items}
+        seen = set()
+        ordered = []
+        for item_id in ordered_ids:
+            item = by_id.get(item_id)
+            if item is not None and item_id not in seen:
+                seen.add(item_id)
+                ordered.append(item)
+        ordered.extend(item for item in items if item.id not in seen)
+        return _renumber(trip, ordered)
+
+
+def move_item(trip, item_id: int, before: Optional[int] = None, after: Optional[int] = None) -> List[ItineraryItem]:
+    """Move one item directly before `before` or after `after`; returns the rows written."""
+    with transaction.atomic():
+        items = _locked_items(trip)
+        moving = next((item for item in items if item.id == item_id), None)
+        if moving is None:
+            raise ValueError(f"item {item_id} not in trip")
+        items.remove(moving)
+        ids = [item.id for item in items]
+        if before is not None:
+            if before not in ids:
+                raise ValueError(f"item {before} not in trip")
+            idx = ids.index(before)
+        elif after is not None:
+            if after not in ids:
+                raise ValueError(f"item {after} not in trip")
+            idx = ids.index(after) + 1
+        else:
+            idx = len(items)
+
+        prev_key = items[idx - 1].order if idx > 0 else None
+        next_key = items[idx].order if idx < len(items) else None
+        if next_key is None:
+            new_key = 0 if prev_key is None else prev_key + _gap()
+        elif prev_key is None:
+            new_key = next_key // 2 if next_key > 0 else None
+        else:
+            new_key = (prev_key + next_key) // 2 if next_key - prev_key > 1 else None
+
+        if new_key is None:
+            # no room between neighbours: renumber the whole list once
+            items.insert(idx, moving)
+            return _renumber(trip, items)
+        if moving.order == new_key:
+            return []
+        moving.order = new_key
+        moving.save(update_fields=["order"])
+        return [moving]
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from typing import Iterable, List
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail, TripInvite
+
+
+def invite_email(invite: TripInvite) -> OutboundEmail:
+    return OutboundEmail(
+        to_email=invite.email,
+        subject=f"Trip invite: {invite.trip.name}",
+        body=f"You are invited. Accept: /api/invites/accept?token={invite.token}",
+    )
+
+
+def enqueue_invites(invites: Iterable[TripInvite]) -> List[OutboundEmail]:
+    """Queue invite emails; call inside the transaction that creates the invites."""
+    return OutboundEmail.objects.bulk_create([invite_email(invite) for invite in invites])
+
+
+def _backoff(attempts: int) -> timedelta:
+    base = getattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 30)
+    cap = getattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(cap, base * 2 ** (attempts - 1)))
+
+
+def deliver_batch(batch_size: int = 100, connection=None) -> dict:
+    """Send up to `batch_size` due emails over one (reused) mail connection.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED where supported, so several
+    workers can drain the outbox concurrently without double-sending.
+    """
+    max_attempts = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+    connection = connection or get_connection()
+    sent, retried, failed = [], [], []
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if not batch:
+            return {"sent": 0, "retried": 0, "failed": 0}
+        connection.open()
+        try:
+            for email in batch:
+                message = EmailMessage(email.subject, email.body, None, [email.to_email], connection=connection)
+                try:
+                    message.send()
+                except Exception as exc:
+                    email.attempts += 1
+                    email.last_error = str(exc)[:1000]
+                    if email.attempts >= max_attempts:
+                        email.status = "failed"
+                        failed.append(email)
+                    else:
+                        email.next_attempt_at = timezone.now() + _backoff(email.attempts)
+                        retried.append(email)
+                else:
+                    email.attempts += 1
+                    email.status = "sent"
+                    email.sent_at = timezone.now()
+                    sent.append(email)
+        finally:
+            connection.close()
+        OutboundEmail.objects.bulk_update(
+            sent + retried + failed, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+        )
+    return {"sent": len(sent), "retried": len(retried), "failed": len(failed)}
@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Opaque cursor pagination; seeks on the leading ordering field so deep pages cost the same as the first."""
+
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("-created_at", "-id")
+
+
+class TripCursorPagination(KeysetCursorPagination):
+    ordering = ("-created_at", "-id")
+
+
+class ItineraryCursorPagination(KeysetCursorPagination):
+    # (trip, order) index
+    ordering = ("order", "id")
+
+
+class PollCursorPagination(KeysetCursorPagination):
+    # (trip, created_at) index
+    ordering = ("-created_at", "-id")
+
+
+class ChatCursorPagination(KeysetCursorPagination):
+    # (trip, created_at, id) index
+    ordering = ("created_at", "id")
@@ -1,5 +1,7 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from . import membership
+
 
 class IsOwnerOrCollaborator(BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -8,11 +10,9 @@ class IsOwnerOrCollaborator(BasePermission):
             return False
         if hasattr(obj, "owner") and obj.owner_id == user.id:
             return True
-        # check related trip owner/collaborators for related objects
-        trip = getattr(obj, "trip", None)
-        if trip:
-            if trip.owner_id == user.id:
-                return True
-            return trip.collaborators.filter(id=user.id).exists()
+        # check related trip owner/collaborators for related objects (cached, no per-object query)
+        trip_id = getattr(obj, "trip_id", None)
+        if trip_id:
+            return membership.is_member(user.id, trip_id)
         # default read-only
         return request.method in SAFE_METHODS
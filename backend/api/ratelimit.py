@@ -0,0 +1,75 @@
+import math
+import time
+from typing import Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+
+
+# INCR the current bucket, read the previous one, one round-trip
+_SLIDING_WINDOW_LUA = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+local previous = redis.call('GET', KEYS[2])
+return {current, tonumber(previous) or 0}
+"""
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'30/10' -> (30 requests, 10 seconds)."""
+    count, seconds = rate.split("/")
+    return int(count), int(seconds)
+
+
+# RATE_LIMITS budget shared by POST /api/messages/ and chat.send frames on the trip socket
+CHAT_SEND_BUDGET = "message-list:POST"
+
+
+def budget_rate(budget: str) -> Tuple[int, int]:
+    rates = getattr(settings, "RATE_LIMITS", {})
+    return parse_rate(rates.get(budget) or rates.get("default", "120/60"))
+
+
+def user_ident(user_id) -> str:
+    return f"u:{user_id}"
+
+
+class SlidingWindowLimiter:
+    """Sliding-window counter: current fixed bucket plus the previous one weighted by overlap.
+
+    Unlike plain fixed buckets this does not allow 2x the limit across a bucket edge, and
+    each check is a single atomic INCR (+ GET of the previous bucket) on the shared cache.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or cache
+        self._script = None
+
+    def hit(self, ident: str, limit: int, window: int) -> Tuple[bool, int]:
+        """Count one request; returns (allowed, retry_after_seconds)."""
+        now = time.time()
+        bucket = int(now // window)
+        elapsed = now - bucket * window
+        current_key = f"rl:{ident}:{window}:{bucket}"
+        previous_key = f"rl:{ident}:{window}:{bucket - 1}"
+        current, previous = self._incr(current_key, previous_key, window * 2)
+        estimated = previous * (window - elapsed) / window + current
+        if estimated <= limit:
+            return True, 0
+        return False, max(1, math.ceil(window - elapsed))
+
+    def _incr(self, current_key: str, previous_key: str, ttl: int) -> Tuple[int, int]:
+        if isinstance(self.backend, RedisCache):
+            keys = [self.backend.make_and_validate_key(k) for k in (current_key, previous_key)]
+            if self._script is None:
+                client = self.backend._cache.get_client(write=True)
+                self._script = client.register_script(_SLIDING_WINDOW_LUA)
+            current, previous = self._script(keys=keys, args=[ttl])
+            return int(current), int(previous)
+        # Non-Redis caches: add+incr are each atomic, just not one round-trip
+        self.backend.add(current_key, 0, timeout=ttl)
+        current = self.backend.incr(current_key)
+        return current, self.backend.get(previous_key) or 0
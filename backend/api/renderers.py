@@ -0,0 +1,14 @@
+from rest_framework.renderers import JSONRenderer
+
+from . import encoding
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer with identical output, encoded through api.encoding; used when JSON_ENCODER=orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return encoding.dumps(data)
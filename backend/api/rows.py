@@ -0,0 +1,46 @@
+"""Plain-dict rows for read-only list endpoints (settings.API_FAST_SERIALIZATION).
+
+Each builder reads a `.values()` queryset and returns exactly what the matching ModelSerializer
+would, key order included, without instantiating models or serializer fields per row.
+"""
+from typing import Iterable, List
+
+from rest_framework import serializers
+
+# Same formatting as the serializers' DateTimeField (timezone + ISO 8601 with "Z", None stays None)
+_dt = serializers.DateTimeField().to_representation
+
+ITINERARY_VALUES = ("id", "trip_id", "title", "description", "start_time", "end_time", "order", "created_at", "updated_at")
+CHAT_VALUES = ("id", "trip_id", "sender_id", "sender__username", "sender__email", "content", "created_at")
+
+
+def itinerary_rows(values: Iterable[dict]) -> List[dict]:
+    """ItineraryItemSerializer output."""
+    return [
+        {
+            "id": v["id"],
+            "trip": v["trip_id"],
+            "title": v["title"],
+            "description": v["description"],
+            "start_time": _dt(v["start_time"]),
+            "end_time": _dt(v["end_time"]),
+            "order": v["order"],
+            "created_at": _dt(v["created_at"]),
+            "updated_at": _dt(v["updated_at"]),
+        }
+        for v in values
+    ]
+
+
+def chat_rows(values: Iterable[dict]) -> List[dict]:
+    """ChatMessageSerializer output."""
+    return [
+        {
+            "id": v["id"],
+            "trip": v["trip_id"],
+            "sender": {"id": v["sender_id"], "username": v["sender__username"], "email": v["sender__email"]},
+            "content": v["content"],
+            "created_at": _dt(v["created_at"]),
+        }
+        for v in values
+    ]
@@ -0,0 +1,169 @@
+"""Ranked full-text search over chat messages and itinerary items (indexes from migration 0006).
+
+Postgres matches the GIN-indexed to_tsvector('simple', ...) expressions and ranks with ts_rank;
+SQLite matches the FTS5 tables and ranks with bm25. Other backends (or SQLite built without
+FTS5) fall back to unindexed icontains, newest first.
+"""
+import logging
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import ChatMessage, ItineraryItem, Trip, TripCollaborator
+from .serializers import ChatMessageSerializer, ItineraryItemSerializer
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("chat", "itinerary")
+
+# Triggers from migration 0006 that keep the FTS5 tables in step with their content tables
+_FTS5_TRIGGERS = {f"api_{table}_fts_{op}" for table in ("chatmessage", "itineraryitem") for op in ("ai", "ad", "au")}
+
+_MEMBER_TRIPS = "SELECT id FROM api_trip WHERE owner_id = %s UNION SELECT trip_id FROM api_tripcollaborator WHERE user_id = %s"
+
+_SQL = {
+    ("postgresql", "chat"): """
+        SELECT m.id, ts_rank(to_tsvector('simple', m.content), q) AS rank
+        FROM api_chatmessage m, websearch_to_tsquery('simple', %s) q
+        WHERE to_tsvector('simple', m.content) @@ q AND m.trip_id IN ({trips})
+        ORDER BY rank DESC, m.id DESC LIMIT %s OFFSET %s""",
+    ("postgresql", "itinerary"): """
+        SELECT i.id, ts_rank(to_tsvector('simple', i.title || ' ' || i.description), q) AS rank
+        FROM api_itineraryitem i, websearch_to_tsquery('simple', %s) q
+        WHERE to_tsvector('simple', i.title || ' ' || i.description) @@ q AND i.trip_id IN ({trips})
+        ORDER BY rank DESC, i.id DESC LIMIT %s OFFSET %s""",
+    ("sqlite", "chat"): """
+        SELECT m.id, -bm25(api_chatmessage_fts) AS rank
+        FROM api_chatmessage_fts JOIN api_chatmessage m ON m.id = api_chatmessage_fts.rowid
+        WHERE api_chatmessage_fts MATCH %s AND m.trip_id IN ({trips})
+        ORDER BY rank DESC, m.id DESC LIMIT %s OFFSET %s""",
+    ("sqlite", "itinerary"): """
+        SELECT i.id, -bm25(api_itineraryitem_fts, 2.0, 1.0) AS rank
+        FROM api_itineraryitem_fts JOIN api_itineraryitem i ON i.id = api_itineraryitem_fts.rowid
+        WHERE api_itineraryitem_fts MATCH %s AND i.trip_id IN ({trips})
+        ORDER BY rank DESC, i.id DESC LIMIT %s OFFSET %s""",
+}
+
+# Unscoped id sets, for admin search
+_MATCH_SQL = {
+    ("postgresql", "chat"): "SELECT id FROM api_chatmessage WHERE to_tsvector('simple', content) @@ websearch_to_tsquery('simple', %s)",
+    ("postgresql", "itinerary"): (
+        "SELECT id FROM api_itineraryitem "
+        "WHERE to_tsvector('simple', title || ' ' || description) @@ websearch_to_tsquery('simple', %s)"
+    ),
+    ("sqlite", "chat"): "SELECT rowid FROM api_chatmessage_fts WHERE api_chatmessage_fts MATCH %s",
+    ("sqlite", "itinerary"): "SELECT rowid FROM api_itineraryitem_fts WHERE api_itineraryitem_fts MATCH %s",
+}
+
+_MODELS = {
+    "chat": (ChatMessage, ChatMessageSerializer, ("content",)),
+    "itinerary": (ItineraryItem, ItineraryItemSerializer, ("title", "description")),
+}
+
+_indexed = {}
+
+
+def indexed() -> bool:
+    """Whether the search indexes from migration 0006 are usable; checked once per process on SQLite."""
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor != "sqlite":
+        return False
+    if connection.alias not in _indexed:
+        _indexed[connection.alias] = _fts5_in_sync()
+    return _indexed[connection.alias]
+
+
+def _fts5_in_sync() -> bool:
+    if "api_chatmessage_fts" not in connection.introspection.table_names():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'api_%_fts_%'")
+        missing = _FTS5_TRIGGERS - {row[0] for row in cursor.fetchall()}
+    if missing:
+        # A table rebuild (SQLite ALTER TABLE via a migration) drops the triggers with the old table,
+        # leaving the FTS5 tables stale; re-run migration 0006's SQL to restore them
+        logger.warning("FTS5 triggers missing (%s); search falls back to unindexed matching", ", ".join(sorted(missing)))
+        return False
+    return True
+
+
+def _fts5_query(text: str) -> str:
+    # Quote every word so user input can't inject FTS5 syntax; prefix-match the last one
+    words = [f'"{w}"' for w in re.findall(r"\w+", text)]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def _ranked_ids(kind: str, text: str, user_id: int, trip_id: Optional[int], limit: int, offset: int) -> List[Tuple[int, float]]:
+    if not indexed():
+        model, _, fields = _MODELS[kind]
+        matches = model.objects.filter(trip_id__in=_trip_ids(user_id, trip_id))
+        for word in text.split():
+            any_field = Q()
+            for field in fields:
+                any_field |= Q(**{f"{field}__icontains": word})
+            matches = matches.filter(any_field)
+        return [(pk, 0.0) for pk in matches.order_by("-id").values_list("id", flat=True)[offset:offset + limit]]
+
+    query = _fts5_query(text) if connection.vendor == "sqlite" else text
+    if not query:
+        return []
+    if trip_id is None:
+        trips, trip_params = _MEMBER_TRIPS, [user_id, user_id]
+    else:
+        trips, trip_params = "%s", [trip_id]
+    with connection.cursor() as cursor:
+        cursor.execute(_SQL[(connection.vendor, kind)].format(trips=trips), [query, *trip_params, limit, offset])
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def matching_ids(kind: str, text: str) -> RawSQL:
+    """Subquery of every matching id for `kind`, for use as filter(id__in=...); requires indexed()."""
+    query = _fts5_query(text) if connection.vendor == "sqlite" else text
+    return RawSQL(_MATCH_SQL[(connection.vendor, kind)], [query or '""'])
+
+
+def _trip_ids(user_id: int, trip_id: Optional[int]):
+    if trip_id is not None:
+        return [trip_id]
+    owned = Trip.objects.filter(owner_id=user_id).values("id")
+    return owned.union(TripCollaborator.objects.filter(user_id=user_id).values("trip_id"))
+
+
+def search(user_id: int, text: str, kinds: Sequence[str] = KINDS, trip_id: Optional[int] = None,
+           limit: int = 20, offset: int = 0) -> Tuple[List[dict], bool]:
+    """Best matches first across `kinds` in the user's trips; returns (results, more).
+
+    Callers check membership before passing trip_id.
+    """
+    if len(kinds) == 1:
+        hits = [(kinds[0], pk, rank) for pk, rank in _ranked_ids(kinds[0], text, user_id, trip_id, limit + 1, offset)]
+    else:
+        # Top offset+limit+1 of each kind is enough to know the merged page
+        hits = [
+            (kind, pk, rank)
+            for kind in kinds
+            for pk, rank in _ranked_ids(kind, text, user_id, trip_id, offset + limit + 1, 0)
+        ]
+        hits.sort(key=lambda hit: (-hit[2], -hit[1]))
+        hits = hits[offset:]
+    more = len(hits) > limit
+    hits = hits[:limit]
+
+    objects = {}
+    for kind in {kind for kind, _, _ in hits}:
+        model, _, _ = _MODELS[kind]
+        qs = model.objects.select_related("sender") if kind == "chat" else model.objects.all()
+        objects[kind] = qs.in_bulk([pk for k, pk, _ in hits if k == kind])
+    results = []
+    for kind, pk, rank in hits:
+        obj = objects[kind].get(pk)
+        if obj is not None:
+            _, serializer, _ = _MODELS[kind]
+            results.append({"type": kind, "rank": round(rank, 6), "item": serializer(obj).data})
+    return results, more
@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import router, transaction
+from django.utils import timezone
 from rest_framework import serializers
 
+from . import versions
 from .models import Trip, TripCollaborator, ItineraryItem, Poll, PollOption, Vote, ChatMessage, TripInvite
 
 
@@ -40,6 +44,13 @@ class ItineraryItemSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["created_at", "updated_at", "trip"]
+        extra_kwargs = {
+            "order": {
+                # Gapped key (ITINERARY_ORDER_GAP apart); moves go through the trip's reorder-itinerary action
+                "required": False,
+                "help_text": "Sort rank key, not a list position. Omit to append.",
+            },
+        }
 
 
 class TripSerializer(serializers.ModelSerializer):
@@ -63,7 +74,9 @@ class TripSerializer(serializers.ModelSerializer):
 
 
 class PollOptionSerializer(serializers.ModelSerializer):
-    votes_count = serializers.IntegerField(source="votes.count", read_only=True)
+    # Writable so poll updates can match options by id (see PollSerializer.update)
+    id = serializers.IntegerField(required=False)
+    votes_count = serializers.IntegerField(source="vote_count", read_only=True)
 
     class Meta:
         model = PollOption
@@ -79,24 +92,93 @@ class PollSerializer(serializers.ModelSerializer):
         fields = ["id", "trip", "question", "created_by", "options", "created_at"]
         read_only_fields = ["created_by", "created_at", "trip"]
 
+    def validate_options(self, options):
+        ids = [opt["id"] for opt in options if opt.get("id") is not None]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Duplicate option id.")
+        texts = [opt["text"] for opt in options]
+        if len(texts) != len(set(texts)):
+            raise serializers.ValidationError("Duplicate option text.")
+        return options
+
     def create(self, validated_data):
         options = validated_data.pop("options", [])
-        poll = Poll.objects.create(**validated_data)
-        for opt in options:
-            PollOption.objects.create(poll=poll, **opt)
+        with transaction.atomic():
+            poll = Poll.objects.create(**validated_data)
+            PollOption.objects.bulk_create([PollOption(poll=poll, text=opt["text"]) for opt in options])
         return poll
 
     def update(self, instance, validated_data):
         options = validated_data.pop("options", None)
         for attr, val in validated_data.items():
             setattr(instance, attr, val)
-        instance.save()
-        if options is not None:
-            instance.options.all().delete()
-            for opt in options:
-                PollOption.objects.create(poll=instance, **opt)
+        with transaction.atomic():
+            # Poll post_save bumps the trip version; the bulk writes below send no signals
+            instance.save()
+            if options is not None:
+                self._sync_options(instance, options)
         return instance
 
+    def _sync_options(self, poll, options):
+        """Diff against the current options so kept ones keep their id, votes and vote_count.
+
+        Matches by id, then by unchanged text; kept, renamed and new options cost a constant number
+        of queries whatever the size.
+        """
+        existing = {o.id: o for o in poll.options.all()}
+        by_text = {o.text: o for o in existing.values()}
+        matched = {}
+        for opt in options:
+            if opt.get("id") is None:
+                continue
+            if opt["id"] not in existing:
+                raise serializers.ValidationError({"options": [f"Option {opt['id']} does not belong to this poll."]})
+            matched[opt["id"]] = opt
+        new = []
+        for opt in options:
+            if opt.get("id") is not None:
+                continue
+            current = by_text.get(opt["text"])
+            if current is not None and current.id not in matched:
+                matched[current.id] = opt
+            else:
+                new.append(PollOption(poll=poll, text=opt["text"]))
+
+        # Texts still held once the removed options are gone; UNIQUE(poll, text) is checked per row
+        kept_texts = {existing[option_id].text for option_id in matched}
+        now = timezone.now()
+        renamed = []
+        for option_id, opt in matched.items():
+            option = existing[option_id]
+            if option.text != opt["text"]:
+                option.text = opt["text"]
+                option.updated_at = now
+                renamed.append(option)
+
+        removed = [option_id for option_id in existing if option_id not in matched]
+        if removed:
+            # Removed first so their texts are free for renames and new options. Raw deletes: the
+            # cascade would load every vote and run a version bump per row, so bump once instead.
+            using = router.db_for_write(PollOption, instance=poll)
+            Vote.objects.filter(option_id__in=removed)._raw_delete(using)
+            PollOption.objects.filter(id__in=removed)._raw_delete(using)
+            versions.bump_for_polls(poll.id)
+        if renamed:
+            if any(option.text in kept_texts for option in renamed):
+                # Swaps and rotations: park the renamed options on unused texts first
+                final = [option.text for option in renamed]
+                used = kept_texts | set(final)
+                for option in renamed:
+                    option.text = f"~{option.id}"
+                    while option.text in used:
+                        option.text += "~"
+                PollOption.objects.bulk_update(renamed, ["text"])
+                for option, text in zip(renamed, final):
+                    option.text = text
+            PollOption.objects.bulk_update(renamed, ["text", "updated_at"])
+        if new:
+            PollOption.objects.bulk_create(new)
+
 
 class VoteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -112,6 +194,7 @@ class ChatMessageSerializer(serializers.ModelSerializer):
         model = ChatMessage
         fields = ["id", "trip", "sender", "content", "created_at"]
         read_only_fields = ["sender", "created_at", "trip"]
+        extra_kwargs = {"content": {"max_length": getattr(settings, "CHAT_MESSAGE_MAX_LENGTH", 4000)}}
 
 
 class TripInviteSerializer(serializers.ModelSerializer):
@@ -119,3 +202,8 @@ class TripInviteSerializer(serializers.ModelSerializer):
         model = TripInvite
         fields = ["id", "trip", "email", "token", "accepted", "created_at"]
         read_only_fields = ["token", "accepted", "created_at", "trip"]
+
+
+class TripInviteBulkSerializer(serializers.Serializer):
+    trip = serializers.IntegerField()
+    emails = serializers.ListField(child=serializers.EmailField(max_length=254), allow_empty=False)
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import authentication, bundles, membership, versions
+from .models import ItineraryItem, Poll, PollOption, Trip, TripCollaborator, Vote
+
+
+@receiver([post_save, post_delete], sender=Trip)
+def _trip_membership_changed(sender, instance, **kwargs):
+    membership.invalidate(instance.owner_id)
+    bundles.invalidate(instance.id)
+
+
+@receiver([post_save, post_delete], sender=TripCollaborator)
+def _collaborator_membership_changed(sender, instance, **kwargs):
+    membership.invalidate(instance.user_id)
+    versions.bump(instance.trip_id)
+
+
+@receiver([post_save, post_delete], sender=ItineraryItem)
+@receiver([post_save, post_delete], sender=Poll)
+def _trip_content_changed(sender, instance, **kwargs):
+    versions.bump(instance.trip_id)
+
+
+@receiver([post_save, post_delete], sender=PollOption)
+@receiver([post_save, post_delete], sender=Vote)
+def _poll_content_changed(sender, instance, **kwargs):
+    versions.bump_for_polls(instance.poll_id)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def _user_changed(sender, instance, **kwargs):
+    authentication.invalidate(instance.pk)
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from api.authentication import TOKEN_VERSION_CLAIM, TripAccessToken, TripRefreshToken, revoke_tokens
+
+User = get_user_model()
+
+
+class TokenVersionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="x")
+
+    def get(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.client.get("/api/trips/")
+
+    def test_for_user_tokens_carry_the_current_version(self):
+        revoke_tokens(self.user.id)
+        access = TripAccessToken.for_user(self.user)
+        self.assertEqual(access[TOKEN_VERSION_CLAIM], 1)
+        self.assertEqual(TripRefreshToken.for_user(self.user).access_token[TOKEN_VERSION_CLAIM], 1)
+        self.assertEqual(self.get(access).status_code, 200)
+
+    def test_revoke_invalidates_for_user_tokens(self):
+        access = TripAccessToken.for_user(self.user)
+        self.assertEqual(self.get(access).status_code, 200)
+        revoke_tokens(self.user.id)
+        self.assertEqual(self.get(access).status_code, 401)
+
+    def test_login_issues_versioned_tokens(self):
+        revoke_tokens(self.user.id)
+        response = self.client.post("/api/auth/token/", {"username": "owner", "password": "x"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(response.json()["access"]).status_code, 200)
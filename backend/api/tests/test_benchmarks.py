@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from api import benchmarks
+from api.models import Poll, PollOption, Trip
+
+User = get_user_model()
+
+
+class SeedTests(TestCase):
+    def test_seed_leaves_other_trips_alone(self):
+        owner = User.objects.create_user("owner", password="x")
+        trip = Trip.objects.create(owner=owner, name="real trip")
+        PollOption.objects.create(poll=Poll.objects.create(trip=trip, question="q", created_by=owner), text="a")
+        version = Trip.objects.get(pk=trip.pk).version
+
+        counts = benchmarks.seed(users=5, trips=2, items=4, messages=4, polls=3, votes_per_poll=3, log=lambda msg: None)
+
+        self.assertEqual(counts["polls"], 3)
+        self.assertEqual(Trip.objects.get(pk=trip.pk).version, version)
+        for option in PollOption.objects.filter(poll__question__startswith="Bench poll "):
+            self.assertEqual(option.vote_count, option.votes.count())
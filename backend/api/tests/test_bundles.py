@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from api import bundles
+from api.models import ChatMessage, ItineraryItem, Poll, PollOption, Trip
+
+User = get_user_model()
+
+
+class TripBundleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.owner, name="trip")
+        self.url = f"/api/trips/{self.trip.id}/bundle/"
+        self.client.force_authenticate(self.owner)
+
+    def bundle(self):
+        with mock.patch.object(bundles, "_render", wraps=bundles._render) as render:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), render.called
+
+    def test_cached_head_is_reused_until_a_write(self):
+        self.bundle()
+        body, rendered = self.bundle()
+        self.assertFalse(rendered)
+        self.assertEqual(body["itinerary"], [])
+
+    def test_rebuilt_after_itinerary_poll_and_trip_writes(self):
+        self.bundle()
+        ItineraryItem.objects.create(trip=self.trip, title="museum")
+        body, rendered = self.bundle()
+        self.assertTrue(rendered)
+        self.assertEqual([i["title"] for i in body["itinerary"]], ["museum"])
+
+        poll = Poll.objects.create(trip=self.trip, created_by=self.owner, question="where?")
+        body, _ = self.bundle()
+        self.assertEqual([p["question"] for p in body["polls"]], ["where?"])
+        PollOption.objects.create(poll=poll, text="beach")
+        body, rendered = self.bundle()
+        self.assertTrue(rendered)
+        self.assertEqual([o["text"] for o in body["polls"][0]["options"]], ["beach"])
+
+        response = self.client.patch(f"/api/trips/{self.trip.id}/", {"name": "renamed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        body, rendered = self.bundle()
+        self.assertTrue(rendered)
+        self.assertEqual(body["trip"]["name"], "renamed")
+
+    def test_fresh_chat_is_appended_to_the_cached_head(self):
+        body, _ = self.bundle()
+        self.assertEqual(body["chat"], [])
+        ChatMessage.objects.create(trip=self.trip, sender=self.owner, content="hello")
+        body, rendered = self.bundle()
+        self.assertFalse(rendered)
+        self.assertEqual([m["content"] for m in body["chat"]], ["hello"])
+
+    def test_non_members_get_404(self):
+        self.client.force_authenticate(User.objects.create_user("stranger", password="x"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get("/api/trips/999999/bundle/").status_code, 404)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
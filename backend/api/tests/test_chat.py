@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api import archive
+from api.models import ChatArchiveChunk, ChatMessage, Trip
+
+User = get_user_model()
+
+
+class ChatListArchiveTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.owner, name="trip")
+        self.client.force_authenticate(self.owner)
+        start = timezone.now() - timedelta(days=1)
+        self.ids = []
+        for i in range(5):
+            message = ChatMessage.objects.create(trip=self.trip, sender=self.owner, content=f"m{i}")
+            ChatMessage.objects.filter(id=message.id).update(created_at=start + timedelta(minutes=i))
+            self.ids.append(message.id)
+        # The three oldest move to the archive
+        cutoff = start + timedelta(minutes=3)
+        self.assertEqual(archive.archive_trip(self.trip.id, cutoff=cutoff), 3)
+        self.assertTrue(ChatArchiveChunk.objects.filter(trip=self.trip).exists())
+
+    def list(self, **params):
+        response = self.client.get("/api/messages/", {"trip": self.trip.id, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_default_list_includes_archived_messages(self):
+        body = self.list()
+        self.assertEqual([m["id"] for m in body["results"]], self.ids)
+        self.assertEqual(body["results"][0]["content"], "m0")
+        self.assertFalse(body["more"])
+
+    def test_default_list_is_the_newest_page_and_pages_back_into_the_archive(self):
+        body = self.list(page_size=2)
+        self.assertEqual([m["id"] for m in body["results"]], self.ids[3:])
+        self.assertTrue(body["more"])
+        body = self.list(page_size=2, before_id=body["results"][0]["id"])
+        self.assertEqual([m["id"] for m in body["results"]], self.ids[1:3])
+        body = self.list(page_size=2, before_id=body["results"][0]["id"])
+        self.assertEqual([m["id"] for m in body["results"]], self.ids[:1])
+        self.assertFalse(body["more"])
+
+    def test_after_id_stays_a_delta(self):
+        body = self.list(after_id=self.ids[3])
+        self.assertEqual([m["id"] for m in body["results"]], self.ids[4:])
+
+    def test_unknown_before_id_is_rejected(self):
+        other = Trip.objects.create(owner=self.owner, name="other")
+        foreign = ChatMessage.objects.create(trip=other, sender=self.owner, content="elsewhere")
+        for before_id in (999999, foreign.id):
+            response = self.client.get("/api/messages/", {"trip": self.trip.id, "before_id": before_id})
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,62 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+
+from api.models import ItineraryItem, Trip
+
+User = get_user_model()
+
+
+class LastModifiedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.owner, name="trip")
+        self.client.force_authenticate(self.owner)
+        self.url = f"/api/itinerary-items/?trip={self.trip.id}"
+
+    def test_same_second_write_is_not_hidden_by_if_modified_since(self):
+        first = self.client.get(self.url)
+        self.assertNotIn("Last-Modified", first.headers)
+        ItineraryItem.objects.create(trip=self.trip, title="new")
+        # A client holding a whole-second date from "now" must not get a 304
+        stale = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=http_date(time.time()))
+        self.assertEqual(stale.status_code, 200)
+
+    def test_settled_trips_get_last_modified(self):
+        Trip.objects.filter(pk=self.trip.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        first = self.client.get(self.url)
+        self.assertIn("Last-Modified", first.headers)
+        again = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first.headers["Last-Modified"])
+        self.assertEqual(again.status_code, 304)
+
+
+class CollectionLastModifiedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.older = Trip.objects.create(owner=self.owner, name="older")
+        self.newer = Trip.objects.create(owner=self.owner, name="newer")
+        Trip.objects.filter(pk=self.older.pk).update(updated_at=timezone.now() - timedelta(minutes=10))
+        Trip.objects.filter(pk=self.newer.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        self.client.force_authenticate(self.owner)
+
+    def test_deleted_trip_is_not_hidden_by_if_modified_since(self):
+        first = self.client.get("/api/trips/")
+        self.assertNotIn("Last-Modified", first.headers)
+        since = http_date((timezone.now() - timedelta(minutes=5)).timestamp())
+        self.assertEqual(self.client.delete(f"/api/trips/{self.newer.id}/").status_code, 204)
+        again = self.client.get("/api/trips/", HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual([t["id"] for t in again.json()["results"]], [self.older.id])
+        stale = self.client.get("/api/trips/", HTTP_IF_NONE_MATCH=first.headers["ETag"])
+        self.assertEqual(stale.status_code, 200)
+
+    def test_single_trip_reads_keep_last_modified(self):
+        self.assertIn("Last-Modified", self.client.get(f"/api/trips/{self.older.id}/").headers)
+        self.assertIn("Last-Modified", self.client.get(f"/api/polls/?trip={self.older.id}").headers)
@@ -0,0 +1,52 @@
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+
+from api.models import ChatMessage, Trip
+from api.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+
+@override_settings(
+    RATE_LIMITS={"default": "1000/60", "message-list:POST": "2/60"},
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class ChatSendTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.user, name="trip")
+
+    async def _send_all(self, frames):
+        comm = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/trips/{self.trip.id}/")
+        comm.scope["user"] = self.user
+        connected, _ = await comm.connect()
+        self.assertTrue(connected)
+        replies = []
+        for frame in frames:
+            await comm.send_json_to(frame)
+            while True:
+                reply = await comm.receive_json_from()
+                if reply.get("client_id") == frame["client_id"] and reply["type"] in ("ack", "error"):
+                    replies.append(reply)
+                    break
+        await comm.disconnect()
+        return replies
+
+    def send_all(self, frames):
+        return async_to_sync(self._send_all)(frames)
+
+    def test_socket_sends_share_the_rest_budget(self):
+        replies = self.send_all([{"type": "chat.send", "content": f"m{i}", "client_id": i} for i in range(3)])
+        self.assertEqual([r["type"] for r in replies], ["ack", "ack", "error"])
+        self.assertIn("rate limit", replies[2]["detail"])
+        self.assertEqual(ChatMessage.objects.filter(trip=self.trip).count(), 2)
+
+    def test_overlong_content_is_rejected(self):
+        replies = self.send_all([{"type": "chat.send", "content": "x" * 5000, "client_id": 1}])
+        self.assertEqual(replies[0]["type"], "error")
+        self.assertFalse(ChatMessage.objects.filter(trip=self.trip).exists())
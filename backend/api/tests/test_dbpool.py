@@ -0,0 +1,54 @@
+import sqlite3
+
+from django.test import SimpleTestCase
+
+from api.dbpool import ConnectionPool, _ping
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def ping(conn):
+    if not conn.alive:
+        raise sqlite3.OperationalError("server closed the connection unexpectedly")
+
+
+class ConnectionPoolPingTests(SimpleTestCase):
+    def test_dead_idle_connection_is_replaced(self):
+        pool = ConnectionPool("test", size=2, ping_after=0)
+        first = pool.acquire(FakeConnection, ping=ping)
+        pool.release(first)
+        first.alive = False
+        second = pool.acquire(FakeConnection, ping=ping)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        stats = pool.stats()
+        self.assertEqual((stats["discarded"], stats["open"], stats["in_use"]), (1, 1, 1))
+
+    def test_live_idle_connection_is_reused(self):
+        pool = ConnectionPool("test", size=2, ping_after=0)
+        first = pool.acquire(FakeConnection, ping=ping)
+        pool.release(first)
+        self.assertIs(pool.acquire(FakeConnection, ping=ping), first)
+        self.assertEqual(pool.stats()["pings"], 1)
+
+    def test_recently_used_connection_skips_the_ping(self):
+        pool = ConnectionPool("test", size=2, ping_after=60)
+        first = pool.acquire(FakeConnection, ping=ping)
+        pool.release(first)
+        first.alive = False
+        self.assertIs(pool.acquire(FakeConnection, ping=ping), first)
+        self.assertEqual(pool.stats()["pings"], 0)
+
+    def test_ping_on_raw_connections(self):
+        conn = sqlite3.connect(":memory:")
+        _ping(conn)
+        conn.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            _ping(conn)
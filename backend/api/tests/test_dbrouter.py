@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, router
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api import dbrouter
+from api.authentication import TripAccessToken
+from api.models import Trip
+
+User = get_user_model()
+
+REPLICA = "replica"
+
+
+# A second SQLite alias mirroring the test database, as settings does for DATABASE_REPLICA_URLS.
+# Registered at import so the test runner sets it up along with "default".
+connections.settings[REPLICA] = dict(connections.settings["default"], TEST={"MIRROR": "default"})
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA], DATABASE_ROUTERS=["api.dbrouter.ReplicaRouter"])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="x")
+        Trip.objects.create(owner=self.user, name="trip")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {TripAccessToken.for_user(self.user)}")
+
+    def request(self, method, *args, **kwargs):
+        with CaptureQueriesContext(connections["default"]) as primary, CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = getattr(self.client, method)(*args, **kwargs)
+        self.assertLess(response.status_code, 400)
+        trip_reads = lambda queries: [q for q in queries if q["sql"].startswith("SELECT") and '"api_trip"' in q["sql"]]
+        return trip_reads(primary.captured_queries), trip_reads(replica.captured_queries)
+
+    def test_safe_reads_go_to_the_replica(self):
+        primary, replica = self.request("get", "/api/trips/")
+        self.assertTrue(replica)
+        self.assertFalse(primary)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        self.request("post", "/api/trips/", {"name": "new"}, format="json")
+        primary, replica = self.request("get", "/api/trips/")
+        self.assertTrue(primary)
+        self.assertFalse(replica)
+        self.assertTrue(dbrouter.is_pinned(f"u:{self.user.id}"))
+        # Once the pin lapses reads go back to the replica
+        cache.delete(dbrouter._key(f"u:{self.user.id}"))
+        primary, replica = self.request("get", "/api/trips/")
+        self.assertTrue(replica)
+
+    def test_reads_after_a_write_in_the_same_request_use_the_primary(self):
+        with dbrouter.routing(replica=True) as state:
+            self.assertEqual(router.db_for_read(Trip), REPLICA)
+            self.assertEqual(router.db_for_write(Trip), "default")
+            self.assertEqual(router.db_for_read(Trip), "default")
+        self.assertTrue(state["wrote"])
+
+    def test_routing_state_is_reset_after_the_request(self):
+        self.request("get", "/api/trips/")
+        self.assertIsNone(dbrouter._state.get())
+        self.assertEqual(router.db_for_read(Trip), "default")
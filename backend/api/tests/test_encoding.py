@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api import encoding
+from api.management.commands.bench_serialization import _EDGE_CASES, _outcome
+
+
+@override_settings(JSON_ENCODER="orjson")
+class EncodingTests(SimpleTestCase):
+    def test_default_renderer_is_drf(self):
+        self.assertEqual(settings.REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"][0], "rest_framework.renderers.JSONRenderer")
+
+    def test_matches_drf_byte_for_byte(self):
+        for sample in _EDGE_CASES:
+            with self.subTest(sample=sample):
+                self.assertEqual(_outcome(encoding.dumps, sample), _outcome(JSONRenderer().render, sample))
+
+    def test_floats_use_drf_formatting(self):
+        self.assertEqual(encoding.dumps({"v": [1e-6, 1e16]}), b'{"v":[1e-06,1e+16]}')
+
+    def test_nan_raises(self):
+        with self.assertRaises(ValueError):
+            encoding.dumps({"v": float("nan")})
@@ -0,0 +1,88 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import re_path
+
+from api.consumers import TripChatConsumer
+from api.models import ChatMessage, Trip
+from api.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+SHARED = {"BACKEND": "api.layers.SharedInMemoryChannelLayer", "CONFIG": {"location": "fanout-test"}}
+
+
+class WorkerBConsumer(TripChatConsumer):
+    # Its own layer instance, as a second daphne worker would have
+    channel_layer_alias = "worker-b"
+
+
+app_a = URLRouter(websocket_urlpatterns)
+app_b = URLRouter([re_path(r"^ws/trips/(?P<trip_id>\d+)/$", WorkerBConsumer.as_asgi())])
+
+
+async def receive_until(comm, wanted):
+    frames = []
+    while not any(wanted(f) for f in frames):
+        frames.append(await comm.receive_json_from())
+    return frames
+
+
+@override_settings(
+    RATE_LIMITS={"default": "1000/60", "message-list:POST": "2/60"},
+    CHANNEL_LAYERS={"default": SHARED, "worker-b": SHARED},
+)
+class SharedLayerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.user, name="trip")
+
+    def tearDown(self):
+        async_to_sync(get_channel_layer().flush)()
+
+    async def _connect(self, app):
+        comm = WebsocketCommunicator(app, f"/ws/trips/{self.trip.id}/")
+        comm.scope["user"] = self.user
+        connected, _ = await comm.connect()
+        self.assertTrue(connected)
+        return comm
+
+    def test_two_app_instances_get_separate_layers_over_one_state(self):
+        a, b = get_channel_layer("default"), get_channel_layer("worker-b")
+        self.assertIsNot(a, b)
+        self.assertIs(a.groups, b.groups)
+
+    def test_group_send_reaches_both_app_instances(self):
+        async def run():
+            comm_a, comm_b = await self._connect(app_a), await self._connect(app_b)
+            await comm_b.send_json_to({"type": "chat.send", "content": "hi", "client_id": 1})
+            is_chat = lambda f: f["type"] == "chat" and f["message"]["content"] == "hi"
+            seen_b = await receive_until(comm_b, lambda f: f["type"] == "ack")
+            if not any(is_chat(f) for f in seen_b):
+                await receive_until(comm_b, is_chat)
+            await receive_until(comm_a, is_chat)
+            await comm_a.disconnect()
+            await comm_b.disconnect()
+
+        async_to_sync(run)()
+
+    def test_sends_through_either_instance_share_one_budget(self):
+        async def send(comm, client_id):
+            await comm.send_json_to({"type": "chat.send", "content": f"m{client_id}", "client_id": client_id})
+            frames = await receive_until(comm, lambda f: f.get("client_id") == client_id)
+            return frames[-1]["type"]
+
+        async def run():
+            comm_a, comm_b = await self._connect(app_a), await self._connect(app_b)
+            results = [await send(comm_a, 1), await send(comm_b, 2), await send(comm_a, 3), await send(comm_b, 4)]
+            await comm_a.disconnect()
+            await comm_b.disconnect()
+            return results
+
+        self.assertEqual(async_to_sync(run)(), ["ack", "ack", "error", "error"])
+        self.assertEqual(ChatMessage.objects.filter(trip=self.trip).count(), 2)
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import membership
+from api.models import Trip, TripCollaborator
+
+User = get_user_model()
+
+
+class MembershipCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.friend = User.objects.create_user("friend", password="x")
+        self.trip = Trip.objects.create(owner=self.owner, name="trip")
+
+    def assertCachedMember(self, user, expected):
+        # Warm first, so the answer after a write has to come from invalidation
+        membership.is_member(user.id, self.trip.id)
+        before = membership.cache_stats()["hits"]
+        self.assertEqual(membership.is_member(user.id, self.trip.id), expected)
+        self.assertEqual(membership.cache_stats()["hits"], before + 1)
+
+    def test_owner_is_a_member(self):
+        self.assertCachedMember(self.owner, True)
+        self.assertEqual(membership.trip_role(self.owner.id, self.trip.id), membership.OWNER)
+
+    def test_adding_a_collaborator_takes_effect_immediately(self):
+        self.assertCachedMember(self.friend, False)
+        TripCollaborator.objects.create(trip=self.trip, user=self.friend)
+        self.assertTrue(membership.is_member(self.friend.id, self.trip.id))
+
+    def test_removing_a_collaborator_takes_effect_immediately(self):
+        collaborator = TripCollaborator.objects.create(trip=self.trip, user=self.friend)
+        self.assertCachedMember(self.friend, True)
+        collaborator.delete()
+        self.assertFalse(membership.is_member(self.friend.id, self.trip.id))
+
+    def test_deleting_a_trip_drops_it_for_owner_and_collaborators(self):
+        TripCollaborator.objects.create(trip=self.trip, user=self.friend)
+        self.assertCachedMember(self.owner, True)
+        self.assertCachedMember(self.friend, True)
+        trip_id = self.trip.id
+        self.trip.delete()
+        self.assertFalse(membership.is_member(self.owner.id, trip_id))
+        self.assertFalse(membership.is_member(self.friend.id, trip_id))
+
+    def test_new_trip_is_visible_to_its_owner(self):
+        self.assertCachedMember(self.owner, True)
+        other = Trip.objects.create(owner=self.owner, name="other")
+        self.assertTrue(membership.is_member(self.owner.id, other.id))
+
+    def test_sharing_through_the_api_opens_the_trip_at_once(self):
+        friend = APIClient()
+        friend.force_authenticate(self.friend)
+        self.assertEqual(friend.get(f"/api/trips/{self.trip.id}/bundle/").status_code, 404)
+        owner = APIClient()
+        owner.force_authenticate(self.owner)
+        response = owner.post(f"/api/trips/{self.trip.id}/collaborators/", {"user_id": self.friend.id, "role": "editor"})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(friend.get(f"/api/trips/{self.trip.id}/bundle/").status_code, 200)
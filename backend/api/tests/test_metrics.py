@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+User = get_user_model()
+
+
+class MetricsAccessTests(TestCase):
+    @override_settings(METRICS_TOKEN="")
+    def test_closed_without_token(self):
+        self.assertEqual(self.client.get("/api/metrics").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_token(self):
+        self.assertEqual(self.client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        self.assertEqual(self.client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_staff_session(self):
+        self.client.force_login(User.objects.create_user("staff", password="x", is_staff=True))
+        self.assertEqual(self.client.get("/api/metrics").status_code, 200)
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from api.models import ItineraryItem, Trip
+
+User = get_user_model()
+
+
+class ItineraryCreateOrderTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.owner, name="trip")
+        self.client.force_authenticate(self.owner)
+
+    def create(self, title, **extra):
+        response = self.client.post("/api/itinerary-items/", {"trip": self.trip.id, "title": title, **extra}, format="json")
+        self.assertEqual(response.status_code, 201, response.content[:200])
+        return response.json()
+
+    def titles(self):
+        return list(ItineraryItem.objects.filter(trip=self.trip).order_by("order", "id").values_list("title", flat=True))
+
+    def test_omitted_order_appends(self):
+        for title in ("a", "b", "c"):
+            self.create(title)
+        self.assertEqual(self.titles(), ["a", "b", "c"])
+
+    def test_explicit_order_is_a_rank_key(self):
+        self.create("a")
+        self.create("b")
+        self.create("between", order=512)
+        self.assertEqual(self.titles(), ["a", "between", "b"])
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api.models import OutboundEmail, Trip, TripInvite
+from api.outbox import deliver_batch
+
+User = get_user_model()
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionRefusedError("smtp down")
+
+
+def queue(to="a@example.com", **fields):
+    return OutboundEmail.objects.create(to_email=to, subject="s", body="b", **fields)
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_BASE_SECONDS=30, OUTBOX_RETRY_MAX_SECONDS=3600)
+class DeliverBatchTests(TestCase):
+    def test_claims_only_due_pending_rows(self):
+        due = queue()
+        later = queue(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        done = queue(status="sent")
+        with mock.patch.object(QuerySet, "select_for_update", autospec=True, side_effect=QuerySet.select_for_update) as claim:
+            self.assertEqual(deliver_batch(), {"sent": 1, "retried": 0, "failed": 0})
+        self.assertTrue(claim.call_args.kwargs["skip_locked"])
+        self.assertEqual([m.to for m in mail.outbox], [[due.to_email]])
+        self.assertEqual(OutboundEmail.objects.get(pk=due.pk).status, "sent")
+        self.assertEqual(OutboundEmail.objects.get(pk=later.pk).status, "pending")
+        self.assertEqual(OutboundEmail.objects.get(pk=done.pk).attempts, 0)
+        # Claimed rows are not sent again
+        self.assertEqual(deliver_batch(), {"sent": 0, "retried": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failure_backs_off_exponentially(self):
+        email = queue()
+        before = timezone.now()
+        self.assertEqual(deliver_batch(connection=FailingBackend()), {"sent": 0, "retried": 1, "failed": 0})
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), ("pending", 1, "smtp down"))
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=30))
+        # Not due yet
+        self.assertEqual(deliver_batch(connection=FailingBackend())["retried"], 0)
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        before = timezone.now()
+        deliver_batch(connection=FailingBackend())
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 2)
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=60))
+        self.assertLess(email.next_attempt_at, before + timedelta(seconds=90))
+
+    def test_gives_up_after_max_attempts(self):
+        email = queue(attempts=2)
+        self.assertEqual(deliver_batch(connection=FailingBackend()), {"sent": 0, "retried": 0, "failed": 1})
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("failed", 3))
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(deliver_batch(connection=FailingBackend()), {"sent": 0, "retried": 0, "failed": 0})
+
+    def test_send_outbox_drains_in_batches(self):
+        for i in range(5):
+            queue(to=f"{i}@example.com")
+        out = StringIO()
+        call_command("send_outbox", batch_size=2, stdout=out)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(out.getvalue().count("sent="), 3)
+        self.assertFalse(OutboundEmail.objects.filter(status="pending").exists())
+
+
+class BulkInviteTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.owner, name="trip")
+        self.client.force_authenticate(self.owner)
+
+    def test_queues_one_email_per_distinct_address(self):
+        emails = ["a@example.com", "b@example.com", "a@example.com"]
+        response = self.client.post("/api/invites/bulk/", {"trip": self.trip.id, "emails": emails}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(TripInvite.objects.filter(trip=self.trip).count(), 2)
+        self.assertEqual(sorted(OutboundEmail.objects.values_list("to_email", flat=True)), ["a@example.com", "b@example.com"])
+
+    def test_malformed_bodies_are_rejected(self):
+        for body in ([{"email": "a@example.com"}], {"trip": self.trip.id, "emails": "a@example.com"},
+                     {"trip": self.trip.id, "emails": ["not an email"]}, {"trip": self.trip.id, "emails": []}):
+            with self.subTest(body=body):
+                response = self.client.post("/api/invites/bulk/", body, format="json")
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(OutboundEmail.objects.exists())
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.models import Poll, PollOption, Trip, Vote
+from api.voting import cast_vote
+
+User = get_user_model()
+
+
+class PollOptionUpdateTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.owner, name="trip")
+        self.poll = Poll.objects.create(trip=self.trip, created_by=self.owner, question="where?")
+        self.a = PollOption.objects.create(poll=self.poll, text="a")
+        self.b = PollOption.objects.create(poll=self.poll, text="b")
+        cast_vote(self.poll, self.owner, self.a)
+        self.client.force_authenticate(self.owner)
+
+    def patch(self, options):
+        return self.client.patch(f"/api/polls/{self.poll.id}/", {"options": options}, format="json")
+
+    def options(self):
+        return {o.id: (o.text, o.vote_count) for o in PollOption.objects.filter(poll=self.poll)}
+
+    def test_rename_keeps_votes(self):
+        response = self.patch([{"id": self.a.id, "text": "c"}, {"id": self.b.id, "text": "b"}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.options(), {self.a.id: ("c", 1), self.b.id: ("b", 0)})
+        self.assertTrue(Vote.objects.filter(option_id=self.a.id).exists())
+
+    def test_swap_texts(self):
+        response = self.patch([{"id": self.a.id, "text": "b"}, {"id": self.b.id, "text": "a"}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.options(), {self.a.id: ("b", 1), self.b.id: ("a", 0)})
+
+    def test_rename_onto_a_removed_text_and_add_the_old_one(self):
+        response = self.patch([{"id": self.b.id, "text": "a"}, {"text": "b"}])
+        self.assertEqual(response.status_code, 200)
+        options = self.options()
+        self.assertEqual(options[self.b.id], ("a", 0))
+        self.assertNotIn(self.a.id, options)
+        self.assertEqual(sorted(options.values()), [("a", 0), ("b", 0)])
+        self.assertFalse(Vote.objects.filter(poll=self.poll).exists())
+
+    def test_removing_an_option_costs_the_same_whatever_its_votes(self):
+        def remove_with_votes(n):
+            option = PollOption.objects.create(poll=self.poll, text=f"gone {n}")
+            for i in range(n):
+                cast_vote(self.poll, User.objects.create_user(f"voter {n} {i}", password="x"), option)
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.patch([{"id": self.a.id, "text": "a"}, {"id": self.b.id, "text": "b"}])
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(PollOption.objects.filter(id=option.id).exists())
+            self.assertFalse(Vote.objects.filter(option_id=option.id).exists())
+            return len(queries)
+
+        self.assertEqual(remove_with_votes(1), remove_with_votes(30))
+        self.assertEqual(self.options(), {self.a.id: ("a", 1), self.b.id: ("b", 0)})
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.models import ChatMessage, ItineraryItem, Poll, PollOption, Trip, TripCollaborator, Vote
+
+User = get_user_model()
+
+
+class ListQueryCountTests(APITestCase):
+    """List/detail endpoints must cost the same number of queries at any data size (no N+1)."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.owner, name="trip")
+        self.client.force_authenticate(self.owner)
+        self.grow(1)
+
+    def grow(self, n):
+        base = Trip.objects.count()
+        for i in range(n):
+            user = User.objects.create_user(f"u{base}-{i}", password="x")
+            TripCollaborator.objects.create(trip=self.trip, user=user, role="editor")
+            extra = Trip.objects.create(owner=self.owner, name=f"extra {base}-{i}")
+            TripCollaborator.objects.create(trip=extra, user=user, role="viewer")
+            ItineraryItem.objects.create(trip=self.trip, title=f"item {base}-{i}", order=(base + i) * 1024)
+            ChatMessage.objects.create(trip=self.trip, sender=user, content=f"hi {i}")
+            poll = Poll.objects.create(trip=self.trip, question=f"q {base}-{i}", created_by=user)
+            options = [PollOption.objects.create(poll=poll, text=t) for t in ("a", "b", "c")]
+            Vote.objects.create(poll=poll, option=options[0], user=user)
+
+    def count(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url):
+        small = self.count(url)
+        self.grow(10)
+        cache.clear()
+        with self.assertNumQueries(small):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_trip_list(self):
+        self.assertConstantQueries("/api/trips/")
+
+    def test_trip_detail(self):
+        self.assertConstantQueries(f"/api/trips/{self.trip.id}/")
+
+    def test_poll_list(self):
+        self.assertConstantQueries(f"/api/polls/?trip={self.trip.id}")
+
+    def test_itinerary_list(self):
+        self.assertConstantQueries(f"/api/itinerary-items/?trip={self.trip.id}")
+
+    def test_chat_list(self):
+        self.assertConstantQueries(f"/api/messages/?trip={self.trip.id}")
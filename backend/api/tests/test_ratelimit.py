@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from api.authentication import TripAccessToken
+from api.ratelimit import SlidingWindowLimiter
+
+User = get_user_model()
+
+START = 6000.0  # start of a 60 s bucket
+
+
+@override_settings(RATE_LIMITS={"default": "3/60", "token_obtain_pair:POST": "1/60"})
+class RateLimitMiddlewareTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        clock = mock.patch("api.ratelimit.time")
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+        self.clock.time.return_value = START + 1
+
+    def get(self, token=None):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        return self.client.get("/api/trips/", **headers)
+
+    def test_429_with_retry_after_once_the_budget_is_spent(self):
+        for _ in range(3):
+            self.assertNotEqual(self.get().status_code, 429)
+        response = self.get()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "59")
+
+    def test_window_rolls_over(self):
+        for _ in range(4):
+            self.get()
+        self.assertEqual(self.get().status_code, 429)
+        # Halfway through the next bucket the previous one still counts for half: 5 * 0.5 > 3 - 1
+        self.clock.time.return_value = START + 90
+        self.assertEqual(self.get().status_code, 429)
+        # Two buckets on the old counts have expired from the estimate
+        self.clock.time.return_value = START + 121
+        self.assertNotEqual(self.get().status_code, 429)
+
+    def test_anonymous_and_authenticated_callers_have_separate_budgets(self):
+        alice = User.objects.create_user("alice", password="x")
+        bob = User.objects.create_user("bob", password="x")
+        for _ in range(3):
+            self.get()
+        self.assertEqual(self.get().status_code, 429)
+        # Same address, but keyed by the JWT's user id
+        token = TripAccessToken.for_user(alice)
+        for _ in range(3):
+            self.assertEqual(self.get(token).status_code, 200)
+        self.assertEqual(self.get(token).status_code, 429)
+        self.assertEqual(self.get(TripAccessToken.for_user(bob)).status_code, 200)
+
+    def test_routes_with_their_own_budget(self):
+        self.client.post("/api/auth/token/", {"username": "x", "password": "y"})
+        self.assertEqual(self.client.post("/api/auth/token/", {"username": "x", "password": "y"}).status_code, 429)
+        self.assertNotEqual(self.get().status_code, 429)
+
+
+class FakeRedisScript:
+    """Runs _SLIDING_WINDOW_LUA's INCR/EXPIRE/GET against a dict."""
+
+    def __init__(self):
+        self.store, self.ttls = {}, {}
+
+    def __call__(self, keys, args):
+        current = self.store.get(keys[0], 0) + 1
+        self.store[keys[0]] = current
+        if current == 1:
+            self.ttls[keys[0]] = args[0]
+        return [current, self.store.get(keys[1]) or 0]
+
+
+class LuaPathTests(SimpleTestCase):
+    def test_redis_backend_uses_one_script_call_per_hit(self):
+        backend = mock.MagicMock(spec=RedisCache)
+        backend.make_and_validate_key.side_effect = lambda key: f":1:{key}"
+        script = FakeRedisScript()
+        backend._cache.get_client.return_value.register_script.return_value = script
+        limiter = SlidingWindowLimiter(backend)
+        with mock.patch("api.ratelimit.time") as clock:
+            clock.time.return_value = START + 1
+            self.assertEqual([limiter.hit("u:1", 2, 60)[0] for _ in range(3)], [True, True, False])
+            self.assertEqual(script.ttls, {":1:rl:u:1:60:100": 120})
+            clock.time.return_value = START + 61
+            # 3 in the previous bucket weighted by 59/60 plus this hit
+            self.assertEqual(limiter.hit("u:1", 2, 60), (False, 59))
+        backend._cache.get_client.return_value.register_script.assert_called_once()
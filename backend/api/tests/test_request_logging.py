@@ -0,0 +1,68 @@
+import io
+import json
+import logging
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from api import dbstats, middleware
+from api.logqueue import BackgroundStreamHandler, JSONLineFormatter
+from api.models import Trip
+
+User = get_user_model()
+
+
+@override_settings(REQUEST_LOG_SAMPLE_RATE=1.0)
+class RequestLoggingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="x")
+        Trip.objects.create(owner=self.user, name="trip")
+        self.client.force_authenticate(self.user)
+        self.stream = io.StringIO()
+        self.handler = BackgroundStreamHandler(self.stream)
+        self.logger = logging.getLogger("api.requests")
+        self.saved = self.logger.handlers
+        self.logger.handlers = [self.handler]
+        self.addCleanup(setattr, self.logger, "handlers", self.saved)
+        self.addCleanup(self.handler.stop)
+
+    def test_records_arrive_through_the_queue_and_are_encoded_by_the_listener(self):
+        self.handler.stop()  # hold records in the queue
+        self.client.get("/api/trips/")
+        record = self.handler.queue.get_nowait()
+        self.assertIsInstance(record.msg, dict)
+        self.assertEqual(self.stream.getvalue(), "")
+
+        formatted_on = []
+        format_dict = JSONLineFormatter.format
+
+        def spy(formatter, rec):
+            formatted_on.append(threading.current_thread())
+            return format_dict(formatter, rec)
+
+        self.handler.queue.put_nowait(record)
+        with mock.patch.object(JSONLineFormatter, "format", spy):
+            self.handler.listener.start()
+            self.handler.stop()  # drains the queue
+        line = json.loads(self.stream.getvalue())
+        self.assertEqual((line["method"], line["path"], line["status"], line["user"]), ("GET", "/api/trips/", 200, self.user.id))
+        self.assertGreater(line["db_queries"], 0)
+        self.assertNotIn(threading.current_thread(), formatted_on)
+
+    def test_queries_are_counted_once_per_request(self):
+        with mock.patch.object(middleware, "count_queries", wraps=dbstats.count_queries) as counted:
+            self.client.get("/api/trips/")
+        self.assertEqual(counted.call_count, 1)
+        self.handler.stop()
+        self.assertGreater(json.loads(self.stream.getvalue())["db_queries"], 0)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_logging_counts_queries_itself_without_metrics(self):
+        self.client.get("/api/trips/")
+        self.handler.stop()
+        self.assertGreater(json.loads(self.stream.getvalue())["db_queries"], 0)
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from api import search
+from api.models import ChatMessage, ItineraryItem, Trip, TripCollaborator
+
+User = get_user_model()
+
+
+class Fts5QueryTests(TestCase):
+    def test_words_are_quoted_and_the_last_is_a_prefix(self):
+        self.assertEqual(search._fts5_query("beach day"), '"beach" "day"*')
+
+    def test_fts5_syntax_is_neutralised(self):
+        self.assertEqual(search._fts5_query('sun" OR content:x NEAR(a b) -c ^d'), '"sun" "OR" "content" "x" "NEAR" "a" "b" "c" "d"*')
+        self.assertEqual(search._fts5_query('" * : ( )'), "")
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        search._indexed.clear()
+        self.owner = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.owner, name="mine")
+        self.client.force_authenticate(self.owner)
+
+    def tearDown(self):
+        search._indexed.clear()
+
+    def ids(self, q, **params):
+        response = self.client.get("/api/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(hit["type"], hit["item"]["id"]) for hit in response.json()["results"]]
+
+    def test_uses_the_fts5_index(self):
+        self.assertTrue(search.indexed())
+
+    def test_title_matches_outrank_description_matches(self):
+        in_description = ItineraryItem.objects.create(trip=self.trip, title="dinner", description="near the harbour")
+        in_title = ItineraryItem.objects.create(trip=self.trip, title="harbour walk", description="")
+        self.assertEqual(self.ids("harbour", type="itinerary"), [("itinerary", in_title.id), ("itinerary", in_description.id)])
+
+    def test_scoped_to_the_callers_trips(self):
+        stranger = User.objects.create_user("stranger", password="x")
+        theirs = Trip.objects.create(owner=stranger, name="theirs")
+        shared = Trip.objects.create(owner=stranger, name="shared")
+        TripCollaborator.objects.create(trip=shared, user=self.owner)
+        mine = ChatMessage.objects.create(trip=self.trip, sender=self.owner, content="ferry at noon")
+        hidden = ChatMessage.objects.create(trip=theirs, sender=stranger, content="ferry at noon")
+        visible = ChatMessage.objects.create(trip=shared, sender=stranger, content="ferry at noon")
+        found = {pk for _, pk in self.ids("ferry", type="chat")}
+        self.assertEqual(found, {mine.id, visible.id})
+        self.assertNotIn(hidden.id, found)
+        self.assertEqual(self.ids("ferry", type="chat", trip=theirs.id), [])
+        self.assertEqual(self.ids("ferry", type="chat", trip=self.trip.id), [("chat", mine.id)])
+
+    def test_index_follows_updates_and_deletes(self):
+        message = ChatMessage.objects.create(trip=self.trip, sender=self.owner, content="museum tickets")
+        item = ItineraryItem.objects.create(trip=self.trip, title="museum", description="")
+        self.assertEqual(len(self.ids("museum")), 2)
+        ChatMessage.objects.filter(pk=message.pk).update(content="gallery tickets")
+        item.title = "gallery"
+        item.save()
+        self.assertEqual(self.ids("museum"), [])
+        self.assertEqual(len(self.ids("gallery")), 2)
+        message.delete()
+        ItineraryItem.objects.filter(pk=item.pk).delete()
+        self.assertEqual(self.ids("gallery"), [])
+
+    def test_missing_triggers_fall_back_to_unindexed_matching(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER api_chatmessage_fts_ai")
+        with self.assertLogs("api.search", "WARNING"):
+            self.assertFalse(search.indexed())
+        message = ChatMessage.objects.create(trip=self.trip, sender=self.owner, content="late checkout")
+        self.assertEqual(self.ids("checkout", type="chat"), [("chat", message.id)])
@@ -0,0 +1,113 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import events
+from api.events import chat_event, trip_group
+from api.models import ChatMessage, ItineraryItem, Trip
+from api.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+
+class SocketTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.user, name="trip")
+
+    def tearDown(self):
+        async_to_sync(get_channel_layer().flush)()
+
+    async def connect(self, query=""):
+        comm = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/trips/{self.trip.id}/{query}")
+        comm.scope["user"] = self.user
+        connected, _ = await comm.connect()
+        self.assertTrue(connected)
+        return comm
+
+    async def publish_chat(self, message):
+        await get_channel_layer().group_send(trip_group(self.trip.id), chat_event(message, self.user))
+
+
+class BackfillTests(SocketTestCase):
+    def test_backfill_overlapping_live_sends_has_no_duplicates(self):
+        first, second, third = [
+            ChatMessage.objects.create(trip=self.trip, sender=self.user, content=f"m{i}") for i in range(3)
+        ]
+
+        async def run():
+            comm = await self.connect(f"?last_seen_id={first.id}")
+            backfill = await comm.receive_json_from()
+            self.assertEqual(backfill["type"], "chat.backfill")
+            self.assertEqual([m["id"] for m in backfill["messages"]], [second.id, third.id])
+            # The send that raced the backfill query arrives live as well, then a new one
+            await self.publish_chat(third)
+            fourth = await database_sync_to_async(ChatMessage.objects.create)(trip=self.trip, sender=self.user, content="m3")
+            await self.publish_chat(fourth)
+            live = await comm.receive_json_from()
+            self.assertEqual(live["message"]["id"], fourth.id)
+            self.assertTrue(await comm.receive_nothing(0.2))
+            await comm.disconnect()
+
+        async_to_sync(run)()
+
+
+@override_settings(WS_BATCH_WINDOW_MS=200)
+class BatchTests(SocketTestCase):
+    def test_sends_within_one_window_arrive_as_one_batch(self):
+        messages = [ChatMessage.objects.create(trip=self.trip, sender=self.user, content=f"m{i}") for i in range(3)]
+
+        async def run():
+            comm = await self.connect()
+            for message in messages:
+                await self.publish_chat(message)
+            frame = await comm.receive_json_from()
+            self.assertEqual(frame["type"], "batch")
+            self.assertEqual([e["message"]["id"] for e in frame["events"]], [m.id for m in messages])
+            self.assertTrue(await comm.receive_nothing(0.3))
+            await comm.disconnect()
+
+        async_to_sync(run)()
+
+
+class EntityEventTests(SocketTestCase):
+    def test_itinerary_write_publishes_once_after_commit(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        async def run():
+            comm = await self.connect()
+            response = await sync_to_async(client.post)(
+                "/api/itinerary-items/", {"trip": self.trip.id, "title": "museum"}, format="json"
+            )
+            self.assertEqual(response.status_code, 201)
+            frame = await comm.receive_json_from()
+            self.assertEqual((frame["type"], frame["action"], frame["item"]["title"]), ("itinerary.updated", "created", "museum"))
+            self.assertTrue(await comm.receive_nothing(0.2))
+            await comm.disconnect()
+
+        async_to_sync(run)()
+
+    def test_rolled_back_write_publishes_nothing(self):
+        def write_and_roll_back():
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                item = ItineraryItem.objects.create(trip=self.trip, title="museum")
+                events.publish_itinerary_updated(item, "created")
+                raise RuntimeError
+
+        async def run():
+            comm = await self.connect()
+            await database_sync_to_async(write_and_roll_back)()
+            self.assertTrue(await comm.receive_nothing(0.3))
+            await comm.disconnect()
+
+        async_to_sync(run)()
+        self.assertFalse(ItineraryItem.objects.exists())
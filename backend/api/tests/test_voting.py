@@ -0,0 +1,62 @@
+import random
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.db.models import Count
+from django.test import TransactionTestCase
+
+from api.models import Poll, PollOption, Trip, Vote
+from api.voting import cast_vote
+
+User = get_user_model()
+
+
+class ConcurrentVotingTests(TransactionTestCase):
+    """Many threads voting and switching on one poll must leave vote_count equal to the Vote rows."""
+
+    THREADS = 8
+    ROUNDS = 25
+
+    def setUp(self):
+        owner = User.objects.create_user("owner", password="x")
+        trip = Trip.objects.create(owner=owner, name="trip")
+        self.poll = Poll.objects.create(trip=trip, question="where?", created_by=owner)
+        self.options = [PollOption.objects.create(poll=self.poll, text=t) for t in ("a", "b", "c")]
+        # Fewer users than threads, so threads also race on the same user's first vote and switches
+        self.users = [User.objects.create_user(f"voter{i}", password="x") for i in range(self.THREADS // 2)]
+
+    def test_counts_match_rows_under_concurrency(self):
+        start = threading.Barrier(self.THREADS)
+        failures = []
+        cast = [0]
+        lock = threading.Lock()
+
+        def voter(seed):
+            rng = random.Random(seed)
+            try:
+                start.wait()
+                for _ in range(self.ROUNDS):
+                    try:
+                        cast_vote(self.poll, rng.choice(self.users), rng.choice(self.options))
+                        with lock:
+                            cast[0] += 1
+                    except OperationalError:
+                        pass  # SQLite "database is locked": the transaction rolled back as a whole
+            except Exception as exc:  # anything else fails the test
+                failures.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=voter, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(failures, [])
+        self.assertGreater(cast[0], 0)
+        rows = dict(Vote.objects.filter(poll=self.poll).values_list("option").annotate(n=Count("id")))
+        for option in PollOption.objects.filter(poll=self.poll):
+            self.assertEqual(option.vote_count, rows.get(option.id, 0), option.text)
+        self.assertLessEqual(Vote.objects.filter(poll=self.poll).count(), len(self.users))
@@ -0,0 +1,57 @@
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase
+
+from api.authentication import JWTAuthMiddleware, TripAccessToken, revoke_tokens
+from api.models import Trip
+from api.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+app = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+
+class SocketAuthTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="x")
+        self.trip = Trip.objects.create(owner=self.user, name="trip")
+        self.path = f"/ws/trips/{self.trip.id}/"
+
+    def connect(self, path=None, subprotocols=None):
+        async def run():
+            comm = WebsocketCommunicator(app, path or self.path, subprotocols=subprotocols)
+            connected, subprotocol = await comm.connect()
+            await comm.disconnect()
+            return connected, subprotocol
+
+        return async_to_sync(run)()
+
+    def test_token_as_subprotocol(self):
+        token = str(TripAccessToken.for_user(self.user))
+        self.assertEqual(self.connect(subprotocols=["bearer", token]), (True, "bearer"))
+
+    def test_token_in_the_query_string_is_not_accepted(self):
+        token = str(TripAccessToken.for_user(self.user))
+        connected, _ = self.connect(f"{self.path}?token={token}")
+        self.assertFalse(connected)
+
+    def test_revoked_token_is_rejected(self):
+        token = str(TripAccessToken.for_user(self.user))
+        revoke_tokens(self.user.id)
+        connected, _ = self.connect(subprotocols=["bearer", token])
+        self.assertFalse(connected)
+
+    def test_missing_or_malformed_token_is_rejected(self):
+        for subprotocols in (None, ["bearer"], ["bearer", "not-a-jwt"]):
+            with self.subTest(subprotocols=subprotocols):
+                connected, _ = self.connect(subprotocols=subprotocols)
+                self.assertFalse(connected)
+
+    def test_non_member_is_rejected(self):
+        stranger = User.objects.create_user("stranger", password="x")
+        connected, _ = self.connect(subprotocols=["bearer", str(TripAccessToken.for_user(stranger))])
+        self.assertFalse(connected)
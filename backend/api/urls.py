@@ -1,5 +1,8 @@
+import hmac
+
 from django.urls import path, include
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
@@ -7,7 +10,9 @@ from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 
-from .views import TripViewSet, ItineraryItemViewSet, PollViewSet, ChatMessageViewSet, TripInviteViewSet
+from . import metrics
+from .authentication import revoke_tokens
+from .views import TripViewSet, ItineraryItemViewSet, PollViewSet, ChatMessageViewSet, TripInviteViewSet, SearchView
 
 router = DefaultRouter()
 router.register(r"trips", TripViewSet, basename="trip")
@@ -19,12 +24,33 @@ router.register(r"invites", TripInviteViewSet, basename="invite")
 urlpatterns = [
     path("auth/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("auth/revoke/", csrf_exempt(lambda request: RevokeTokensView.as_view()(request)), name="token_revoke"),
     path("auth/signup/", csrf_exempt(lambda request: SignupView.as_view()(request))),
+    path("search/", SearchView.as_view(), name="search"),
     path("", include(router.urls)),
     path("invites/accept", csrf_exempt(lambda request: _accept_invite(request))),
+    path("metrics", lambda request: _metrics(request)),
 ]
 
 
+class RevokeTokensView(APIView):
+    """Log out everywhere: every access/refresh token issued to the caller stops working."""
+
+    def post(self, request):
+        revoke_tokens(request.user.id)
+        return HttpResponse(status=204)
+
+
+def _metrics(request):
+    # Prometheus text format, per worker process. Closed by default: scrapers send
+    # "Authorization: Bearer <METRICS_TOKEN>"; staff can also read it with an admin session.
+    token = getattr(settings, "METRICS_TOKEN", "")
+    scraper = bool(token) and hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}")
+    if not (scraper or getattr(request.user, "is_staff", False)):
+        return JsonResponse({"detail": "forbidden"}, status=403)
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def _accept_invite(request):
     from django.contrib.auth import get_user_model
     from django.shortcuts import get_object_or_404
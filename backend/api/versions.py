@@ -0,0 +1,22 @@
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Poll, Trip
+
+
+def _bump(trips) -> None:
+    trips.update(version=F("version") + 1, updated_at=timezone.now())
+
+
+def bump(*trip_ids) -> None:
+    """Advance the trips' version and updated_at so conditional-GET validators go stale."""
+    ids = {i for i in trip_ids if i is not None}
+    if ids:
+        _bump(Trip.objects.filter(pk__in=ids))
+
+
+def bump_for_polls(*poll_ids) -> None:
+    """bump() for the trips owning these polls; no ids means every trip that has a poll."""
+    ids = {i for i in poll_ids if i is not None}
+    polls = Poll.objects.filter(pk__in=ids) if ids else Poll.objects.all()
+    _bump(Trip.objects.filter(pk__in=polls.values("trip_id")))
@@ -1,15 +1,26 @@
+import secrets
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from asgiref.sync import async_to_sync
+from rest_framework.views import APIView
 from channels.layers import get_channel_layer
 
-from .models import Trip, TripCollaborator, ItineraryItem, Poll, PollOption, Vote, ChatMessage, TripInvite
+from . import bundles, events, membership, ordering, outbox, rows, search
+from .chat import messages_after, messages_before
+from .conditional import conditional
+from .events import chat_event
+from .models import Trip, TripCollaborator, ItineraryItem, Poll, PollOption, ChatMessage, TripInvite
+from .pagination import TripCursorPagination, ItineraryCursorPagination, PollCursorPagination, ChatCursorPagination
 from .permissions import IsOwnerOrCollaborator
+from .voting import cast_vote
 from .serializers import (
     TripSerializer,
     TripCollaboratorSerializer,
@@ -17,18 +28,56 @@ from .serializers import (
     PollSerializer,
     ChatMessageSerializer,
     TripInviteSerializer,
+    TripInviteBulkSerializer,
 )
 
 User = get_user_model()
 
 
+def _member_filter(user, trip_field=None):
+    """Owner-or-collaborator filter using an EXISTS subquery, so no join fan-out and no DISTINCT."""
+    if trip_field is None:
+        owner, outer = "owner_id", "pk"
+    else:
+        owner, outer = f"{trip_field}__owner_id", f"{trip_field}_id"
+    collaborates = TripCollaborator.objects.filter(trip_id=OuterRef(outer), user_id=user.id)
+    return Q(**{owner: user.id}) | Q(Exists(collaborates))
+
+
+def _member_trips(user, trip_id=None):
+    trips = Trip.objects.filter(_member_filter(user))
+    if trip_id is None:
+        return trips
+    return trips.filter(pk=trip_id) if str(trip_id).isdigit() else trips.none()
+
+
+def _fast_serialization():
+    return getattr(settings, "API_FAST_SERIALIZATION", False)
+
+
 class TripViewSet(viewsets.ModelViewSet):
     serializer_class = TripSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrCollaborator]
+    pagination_class = TripCursorPagination
 
     def get_queryset(self):
         user = self.request.user
-        return Trip.objects.filter(Q(owner=user) | Q(collaborators=user)).distinct()
+        return (
+            Trip.objects.filter(_member_filter(user))
+            .select_related("owner")
+            .prefetch_related("collaborators")
+        )
+
+    def validator_trips(self):
+        return _member_trips(self.request.user, self.kwargs.get("pk"))
+
+    @conditional("trips")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional("trip")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -46,41 +95,112 @@ class TripViewSet(viewsets.ModelViewSet):
         )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=["get"], url_path="bundle")
+    def bundle(self, request, pk=None):
+        # Trip + itinerary + polls + recent chat in one response, served from the per-trip cache.
+        # Membership comes from the cached role map instead of get_object()'s queryset.
+        if not str(pk).isdigit() or not membership.is_member(request.user.id, pk):
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        body = bundles.trip_bundle(int(pk))
+        if body is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(body, content_type="application/json")
+
     @action(detail=True, methods=["post"], url_path="reorder-itinerary")
     def reorder_itinerary(self, request, pk=None):
         trip = self.get_object()
-        order = request.data.get("order", [])
-        # order is list of item ids in desired order
-        id_to_item = {i.id: i for i in trip.itinerary_items.all()}
-        for idx, item_id in enumerate(order):
-            item = id_to_item.get(item_id)
-            if item:
-                item.order = idx
-                item.save(update_fields=["order"])
-        return Response({"status": "ok"})
+        # Either {"order": [ids...]} for a full ordering, or move deltas:
+        # {"id", "before"/"after"} or {"moves": [{"id", "before"/"after"}, ...]}
+        order = request.data.get("order")
+        moves = request.data.get("moves")
+        if moves is None and request.data.get("id") is not None:
+            moves = [request.data]
+        try:
+            if order is not None:
+                changed = ordering.apply_order(trip, order)
+            elif moves:
+                changed = {}
+                with transaction.atomic():
+                    for move in moves:
+                        for item in ordering.move_item(trip, move["id"], before=move.get("before"), after=move.get("after")):
+                            changed[item.id] = item
+                changed = list(changed.values())
+            else:
+                return Response({"detail": "order or moves required"}, status=status.HTTP_400_BAD_REQUEST)
+        except (KeyError, TypeError, ValueError) as exc:
+            return Response({"detail": f"invalid reorder: {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+        events.publish_itinerary_reordered(trip.id, changed)
+        return Response({"status": "ok", "updated": len(changed)})
 
 
 class ItineraryItemViewSet(viewsets.ModelViewSet):
     serializer_class = ItineraryItemSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrCollaborator]
+    pagination_class = ItineraryCursorPagination
 
     def get_queryset(self):
         user = self.request.user
-        return ItineraryItem.objects.filter(Q(trip__owner=user) | Q(trip__collaborators=user)).distinct()
+        qs = ItineraryItem.objects.filter(_member_filter(user, "trip"))
+        trip_id = self.request.query_params.get("trip")
+        if trip_id:
+            qs = qs.filter(trip_id=trip_id)
+        return qs
+
+    def validator_trips(self):
+        return _member_trips(self.request.user, self.request.query_params.get("trip"))
+
+    @conditional("itinerary")
+    def list(self, request, *args, **kwargs):
+        if not _fast_serialization():
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()).values(*rows.ITINERARY_VALUES))
+        return self.get_paginated_response(rows.itinerary_rows(page))
 
     def perform_create(self, serializer):
         trip_id = self.request.data.get("trip") or self.kwargs.get("trip_pk")
         trip = get_object_or_404(Trip, id=trip_id)
-        serializer.save(trip=trip)
+        extra = {}
+        if "order" not in serializer.validated_data:
+            # Append: the model default of 0 would put the item first
+            extra["order"] = ordering.next_order(trip)
+        item = serializer.save(trip=trip, **extra)
+        events.publish_itinerary_updated(item, "created")
+
+    def perform_update(self, serializer):
+        item = serializer.save()
+        events.publish_itinerary_updated(item, "updated")
+
+    def perform_destroy(self, instance):
+        item_id = instance.id
+        instance.delete()
+        instance.id = item_id
+        events.publish_itinerary_updated(instance, "deleted")
 
 
 class PollViewSet(viewsets.ModelViewSet):
     serializer_class = PollSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrCollaborator]
+    pagination_class = PollCursorPagination
 
     def get_queryset(self):
         user = self.request.user
-        return Poll.objects.filter(Q(trip__owner=user) | Q(trip__collaborators=user)).distinct()
+        options = PollOption.objects.order_by("id")
+        qs = (
+            Poll.objects.filter(_member_filter(user, "trip"))
+            .select_related("created_by")
+            .prefetch_related(Prefetch("options", queryset=options))
+        )
+        trip_id = self.request.query_params.get("trip")
+        if trip_id:
+            qs = qs.filter(trip_id=trip_id)
+        return qs
+
+    def validator_trips(self):
+        return _member_trips(self.request.user, self.request.query_params.get("trip"))
+
+    @conditional("polls")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         trip_id = self.request.data.get("trip")
@@ -92,44 +212,75 @@ class PollViewSet(viewsets.ModelViewSet):
         poll = self.get_object()
         option_id = request.data.get("option_id")
         option = get_object_or_404(PollOption, id=option_id, poll=poll)
-        Vote.objects.update_or_create(poll=poll, user=request.user, defaults={"option": option})
+        if cast_vote(poll, request.user, option):
+            events.publish_poll_tally(poll)
         return Response({"status": "ok"})
 
 
 class ChatMessageViewSet(mixins.ListModelMixin, mixins.CreateModelMixin, viewsets.GenericViewSet):
+    """Chat messages. Unlike the other lists, a trip's chat is paged by message id, not by cursor:
+
+    - GET ?trip=<id> is the newest page and GET ?trip=<id>&before_id=<id> the page before that
+      message; both read through into the chat archive. before_id must be a message of the trip.
+    - GET ?trip=<id>&after_id=<id> is the incremental sync: messages newer than after_id.
+    - All three return {"results": [...oldest first], "more": bool}; "more" means older messages
+      remain (before_id) or newer ones (after_id). Non-members get an empty page.
+    - Without ?trip= the list spans every member trip with the usual {next, previous, results} cursor.
+    """
+
     serializer_class = ChatMessageSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrCollaborator]
+    pagination_class = ChatCursorPagination
 
     def get_queryset(self):
         trip_id = self.request.query_params.get("trip")
-        qs = ChatMessage.objects.all().select_related("sender")
+        qs = ChatMessage.objects.filter(_member_filter(self.request.user, "trip")).select_related("sender")
         if trip_id:
             qs = qs.filter(trip_id=trip_id)
         last_id = self.request.query_params.get("after_id")
         if last_id:
             qs = qs.filter(id__gt=last_id)
-        return qs.order_by("id")[:200]
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        # Shapes are documented on the class. The after_id delta is one range scan on
+        # (trip, created_at, id), so an up-to-date client gets [] cheaply.
+        trip_id = request.query_params.get("trip")
+        after_id = request.query_params.get("after_id")
+        before_id = request.query_params.get("before_id")
+        delta = bool(after_id) and not before_id
+        if not trip_id:
+            if not _fast_serialization():
+                return super().list(request, *args, **kwargs)
+            page = self.paginate_queryset(self.filter_queryset(self.get_queryset()).values(*rows.CHAT_VALUES))
+            return self.get_paginated_response(rows.chat_rows(page))
+        try:
+            trip_id, after_id = int(trip_id), int(after_id or 0)
+            before_id = int(before_id) if before_id else None
+        except ValueError:
+            return Response({"detail": "trip, after_id and before_id must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not membership.is_member(request.user.id, trip_id):
+            return Response({"results": [], "more": False})
+        limit = self.paginator.get_page_size(request)
+        if not delta:
+            try:
+                results, more = messages_before(trip_id, before_id, limit)
+            except ChatMessage.DoesNotExist:
+                return Response({"detail": "before_id is not a message in this trip"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"results": results, "more": more})
+        if _fast_serialization():
+            found = list(messages_after(trip_id, after_id).values(*rows.CHAT_VALUES)[: limit + 1])
+            return Response({"results": rows.chat_rows(found[:limit]), "more": len(found) > limit})
+        found = list(messages_after(trip_id, after_id)[: limit + 1])
+        return Response({"results": self.get_serializer(found[:limit], many=True).data, "more": len(found) > limit})
 
     def perform_create(self, serializer):
         trip_id = self.request.data.get("trip")
         trip = get_object_or_404(Trip, id=trip_id)
         message = serializer.save(trip=trip, sender=self.request.user)
-        # Broadcast to websocket group
-        channel_layer = get_channel_layer()
-        if channel_layer is not None:
-            async_to_sync(channel_layer.group_send)(
-                f"trip_{trip.id}",
-                {
-                    "type": "chat.message",
-                    "message": {
-                        "id": message.id,
-                        "trip": trip.id,
-                        "content": message.content,
-                        "created_at": message.created_at.isoformat(),
-                        "sender": {"id": self.request.user.id, "username": self.request.user.get_username()},
-                    },
-                },
-            )
+        # Broadcast to websocket group (clients on a socket can send through TripChatConsumer instead)
+        if get_channel_layer() is not None:
+            events.group_send_sync(trip.id, chat_event(message, self.request.user), "chat")
 
 
 class TripInviteViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
@@ -140,17 +291,53 @@ class TripInviteViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
         return TripInvite.objects.none()
 
     def perform_create(self, serializer):
-        import secrets
         trip_id = self.request.data.get("trip")
         trip = get_object_or_404(Trip, id=trip_id)
-        invite = serializer.save(trip=trip, token=secrets.token_hex(16))
-        # send sync email (placeholder using console backend by default)
-        from django.core.mail import send_mail
-
-        send_mail(
-            subject=f"Trip invite: {trip.name}",
-            message=f"You are invited. Accept: /api/invites/accept?token={invite.token}",
-            from_email=None,
-            recipient_list=[invite.email],
-            fail_silently=True,
+        # email goes through the outbox (drained by `manage.py send_outbox`), never inline
+        with transaction.atomic():
+            invite = serializer.save(trip=trip, token=secrets.token_hex(16))
+            outbox.enqueue_invites([invite])
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        serializer = TripInviteBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        trip = get_object_or_404(Trip, id=serializer.validated_data["trip"])
+        if not membership.is_member(request.user.id, trip.id):
+            return Response({"detail": "Not a member of this trip"}, status=status.HTTP_403_FORBIDDEN)
+        emails = list(dict.fromkeys(serializer.validated_data["emails"]))
+        invites = [TripInvite(trip=trip, email=email, token=secrets.token_hex(16)) for email in emails]
+        with transaction.atomic():
+            TripInvite.objects.bulk_create(invites)
+            outbox.enqueue_invites(invites)
+        return Response(TripInviteSerializer(invites, many=True).data, status=status.HTTP_201_CREATED)
+
+
+class SearchView(APIView):
+    """GET /api/search/?q=...&type=chat|itinerary&trip=&page_size=&offset= ranked over the user's trips."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"detail": "q required"}, status=status.HTTP_400_BAD_REQUEST)
+        kind = request.query_params.get("type")
+        if kind and kind not in search.KINDS:
+            return Response({"detail": f"type must be one of {', '.join(search.KINDS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        trip_id = request.query_params.get("trip")
+        offset = request.query_params.get("offset", "0")
+        if (trip_id and not trip_id.isdigit()) or not offset.isdigit():
+            return Response({"detail": "trip and offset must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if trip_id and not membership.is_member(request.user.id, trip_id):
+            return Response({"results": [], "more": False})
+        limit = ChatCursorPagination().get_page_size(request)
+        results, more = search.search(
+            request.user.id,
+            text,
+            kinds=(kind,) if kind else search.KINDS,
+            trip_id=int(trip_id) if trip_id else None,
+            limit=limit,
+            offset=int(offset),
         )
+        return Response({"results": results, "more": more})
@@ -0,0 +1,52 @@
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import versions
+from .models import PollOption, Vote
+
+
+def cast_vote(poll, user, option) -> bool:
+    """Record (or switch) a user's vote and keep PollOption.vote_count in step.
+
+    Counters move with F() increments inside the same transaction as the Vote row, so
+    concurrent voters never lose updates. Returns False when the vote was unchanged.
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                vote = Vote.objects.select_for_update().filter(poll=poll, user=user).first()
+                if vote is None:
+                    Vote.objects.create(poll=poll, user=user, option=option)
+                    PollOption.objects.filter(id=option.id).update(vote_count=F("vote_count") + 1)
+                    return True
+                if vote.option_id == option.id:
+                    return False
+                old_option_id = vote.option_id
+                vote.option = option
+                vote.save(update_fields=["option", "updated_at"])
+                PollOption.objects.filter(id=old_option_id, vote_count__gt=0).update(vote_count=F("vote_count") - 1)
+                PollOption.objects.filter(id=option.id).update(vote_count=F("vote_count") + 1)
+                return True
+        except IntegrityError:
+            # Lost a race creating this user's first vote; the retry sees the row and switches it instead
+            if attempt:
+                raise
+    return False
+
+
+def reconcile_vote_counts(*poll_ids: Optional[int]) -> int:
+    """Rebuild vote_count from Vote rows in one UPDATE; returns the number of options touched.
+
+    No poll ids means every poll, and every trip with a poll gets its version bumped.
+    """
+    ids = {i for i in poll_ids if i is not None}
+    counts = Vote.objects.filter(option=OuterRef("pk")).order_by().values("option").annotate(c=Count("id")).values("c")
+    options = PollOption.objects.all()
+    if ids:
+        options = options.filter(poll_id__in=ids)
+    updated = options.update(vote_count=Coalesce(Subquery(counts), 0))
+    versions.bump_for_polls(*ids)
+    return updated
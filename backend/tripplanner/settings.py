@@ -61,8 +61,10 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # Custom middleware
+    "api.middleware.MetricsMiddleware",
     "api.middleware.RequestResponseLoggingMiddleware",
     "api.middleware.RateLimitMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
     "api.middleware.GlobalExceptionMiddleware",
 ]
 
@@ -109,20 +111,104 @@ else:
         }
     }
 
+# Comma-separated read replica URLs (locally e.g. sqlite:////abs/path/replica.sqlite3, a copy of db.sqlite3).
+# Safe-method requests read from them via api.dbrouter unless the client wrote within REPLICA_STICKY_SECONDS.
+REPLICA_DATABASES = []
+for _i, _url in enumerate(filter(None, os.getenv("DATABASE_REPLICA_URLS", "").split(",")), start=1):
+    DATABASES[f"replica{_i}"] = dj_database_url.parse(_url.strip(), conn_max_age=600, conn_health_checks=True)
+    DATABASES[f"replica{_i}"]["TEST"] = {"MIRROR": "default"}
+    REPLICA_DATABASES.append(f"replica{_i}")
+if REPLICA_DATABASES:
+    DATABASE_ROUTERS = ["api.dbrouter.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+
+# DB_POOL=True serves connections from a bounded per-process pool (api.dbpool) instead of one
+# persistent connection per asgiref thread; connections go back to the pool at request end.
+DB_POOL = os.getenv("DB_POOL", "False") == "True"
+for _db in DATABASES.values() if DB_POOL else ():
+    _db.update(
+        ENGINE="api.dbpool." + _db["ENGINE"].rsplit(".", 1)[1],
+        CONN_MAX_AGE=0,
+        CONN_HEALTH_CHECKS=False,
+        POOL={
+            "SIZE": int(os.getenv("DB_POOL_SIZE", "10")),
+            # Extra connections opened under load, closed again when returned
+            "MAX_OVERFLOW": int(os.getenv("DB_POOL_MAX_OVERFLOW", "5")),
+            # Seconds to wait for a free connection before raising api.dbpool.PoolTimeout (503)
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            # Connections older than this many seconds are closed instead of reused
+            "RECYCLE": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            # Connections idle longer than this many seconds get a SELECT 1 before reuse; dead ones are replaced
+            "PING_AFTER": float(os.getenv("DB_POOL_PING_AFTER", "30")),
+        },
+    )
+
 # ================== CACHES ==================
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "tripplanner-cache",
+# REDIS_URL (e.g. redis://redis:6379/0) shares the cache and channel layer across daphne workers.
+# Without it everything stays in-process, which is only correct for a single worker.
+REDIS_URL = os.getenv("REDIS_URL", "")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            # Passed to redis-py's ConnectionPool: one bounded pool per worker
+            "OPTIONS": {"max_connections": REDIS_MAX_CONNECTIONS},
+        }
     }
-}
+else:
+    # LocMemCache instances with the same LOCATION share storage within the process
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tripplanner-cache",
+        }
+    }
+
+# Per-user trip membership sets (api.membership), invalidated by signals
+TRIP_MEMBERSHIP_CACHE_TTL = int(os.getenv("TRIP_MEMBERSHIP_CACHE_TTL", "300"))
+
+# Pre-rendered /trips/<id>/bundle/ bodies (api.bundles), keyed to the trip version; recent chat is appended live
+TRIP_BUNDLE_CACHE_TTL = int(os.getenv("TRIP_BUNDLE_CACHE_TTL", "300"))
+TRIP_BUNDLE_CHAT_LIMIT = int(os.getenv("TRIP_BUNDLE_CHAT_LIMIT", "50"))
 
 # ================== CHANNELS (WebSocket) ==================
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [os.getenv("CHANNEL_REDIS_URL", REDIS_URL)],
+                "capacity": int(os.getenv("CHANNEL_LAYER_CAPACITY", "1500")),
+                "expiry": 10,
+            },
+        }
     }
-}
+else:
+    # Process-wide fake: separate layer instances share groups, so multi-worker fan-out can be exercised locally
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "api.layers.SharedInMemoryChannelLayer",
+            "CONFIG": {"location": "tripplanner"},
+        }
+    }
+
+# Max messages replayed to a reconnecting socket (?last_seen_id=); beyond that the client pages via REST
+CHAT_BACKFILL_LIMIT = int(os.getenv("CHAT_BACKFILL_LIMIT", "500"))
+# Longest chat message accepted, over REST and over the trip socket alike
+CHAT_MESSAGE_MAX_LENGTH = int(os.getenv("CHAT_MESSAGE_MAX_LENGTH", "4000"))
+
+# Chat tiering (manage.py archive_chat): messages older than CHAT_ARCHIVE_AFTER_DAYS, and all messages of
+# trips that ended CHAT_ARCHIVE_ENDED_TRIP_DAYS ago, move into compressed per-trip chunks
+CHAT_ARCHIVE_AFTER_DAYS = int(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", "90"))
+CHAT_ARCHIVE_ENDED_TRIP_DAYS = int(os.getenv("CHAT_ARCHIVE_ENDED_TRIP_DAYS", "30"))
+CHAT_ARCHIVE_CHUNK_SIZE = int(os.getenv("CHAT_ARCHIVE_CHUNK_SIZE", "500"))
+
+# WebSocket fan-out coalescing (api.consumers): events within the window go out as one batch frame; 0 disables
+WS_BATCH_WINDOW_MS = int(os.getenv("WS_BATCH_WINDOW_MS", "0"))
+WS_BATCH_MAX_EVENTS = int(os.getenv("WS_BATCH_MAX_EVENTS", "100"))
 
 # ================== AUTH ==================
 AUTH_PASSWORD_VALIDATORS = [
@@ -145,15 +231,31 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # ================== REST FRAMEWORK ==================
+# Opt-in "orjson" (when installed) or the default "json": encoder behind the API renderer and WebSocket frames
+JSON_ENCODER = os.getenv("JSON_ENCODER", "json")
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Cursor pagination on every list endpoint (override per request with ?page_size=)
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetCursorPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", "50")),
+    # JSON_ENCODER=orjson opts into api.renderers.FastJSONRenderer (same bytes, encoded with api.encoding)
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.FastJSONRenderer" if JSON_ENCODER == "orjson" else "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
+# Opt-in: itinerary and chat lists build rows with .values() instead of ModelSerializer instances
+API_FAST_SERIALIZATION = os.getenv("API_FAST_SERIALIZATION", "False") == "True"
+
+# Spacing between itinerary order keys (api.ordering); 1 = dense numbering, larger gaps let single moves write one row
+ITINERARY_ORDER_GAP = int(os.getenv("ITINERARY_ORDER_GAP", "1024"))
 
 # ================== API DOCS (Swagger) ==================
 SPECTACULAR_SETTINGS = {
@@ -167,6 +269,21 @@ SPECTACULAR_SETTINGS = {
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    # Tokens carry the per-user token version checked by api.authentication
+    "TOKEN_OBTAIN_SERIALIZER": "api.authentication.TripTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "api.authentication.TripTokenRefreshSerializer",
+}
+
+# Cached user fields + token version behind ClaimsJWTAuthentication (invalidated on user save / revoke)
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+
+# ================== RATE LIMITS ==================
+# "<requests>/<seconds>" per client, looked up by "<url name>:<METHOD>", then "<url name>", then "default"
+RATE_LIMITS = {
+    "default": os.getenv("RATE_LIMIT_DEFAULT", "120/60"),
+    "message-list:POST": os.getenv("RATE_LIMIT_CHAT_SEND", "30/10"),
+    "trip-list:GET": os.getenv("RATE_LIMIT_TRIP_LIST", "60/60"),
+    "token_obtain_pair": os.getenv("RATE_LIMIT_LOGIN", "10/60"),
 }
 
 # ================== CORS ==================
@@ -183,6 +300,10 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "False").lower() == "true"
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "noreply@tripplanner.local")
+# Outbox retry policy (api.outbox): exponential backoff from the base, capped, then marked failed
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BASE_SECONDS = int(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "30"))
+OUTBOX_RETRY_MAX_SECONDS = int(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "3600"))
 
 # ================== SECURITY HEADERS (Production Only) ==================
 if not DEBUG:
@@ -214,6 +335,10 @@ LOGGING = {
             "class": "logging.StreamHandler",
             "formatter": "verbose",
         },
+        # Request lines are preformatted JSON; a background thread does the stdout writes
+        "request_queue": {
+            "class": "api.logqueue.BackgroundStreamHandler",
+        },
     },
     "root": {
         "handlers": ["console"],
@@ -225,5 +350,20 @@ LOGGING = {
             "level": os.getenv("DJANGO_LOG_LEVEL", "INFO"),
             "propagate": False,
         },
+        "api.requests": {
+            "handlers": ["request_queue"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
+
+# Metrics (api.metrics, served at /api/metrics); cheap enough to leave on in production
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+# Bearer token the scraper must send; unset means only staff sessions can read /api/metrics
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Request logging (api.middleware.RequestResponseLoggingMiddleware): fraction of fast 2xx/3xx
+# requests to log; errors and requests slower than REQUEST_LOG_SLOW_MS are always logged
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "1.0"))
+REQUEST_LOG_SLOW_MS = int(os.getenv("REQUEST_LOG_SLOW_MS", "500"))
@@ -79,7 +79,7 @@ class ChatBloc extends Bloc<ChatEvent, ChatState> {
     _currentTripId = event.tripId;
     try {
       final res = await _api.get('messages/', query: {'trip': event.tripId});
-      final messages = List<Map<String, dynamic>>.from(res.data as List);
+      final messages = List<Map<String, dynamic>>.from(res.data['results'] as List);
       if (messages.isNotEmpty) {
         _lastId = messages.last['id'] as int;
       }
@@ -99,8 +99,9 @@ class ChatBloc extends Bloc<ChatEvent, ChatState> {
     Emitter<ChatState> emit,
   ) async {
     // Optimistically show the message
+    // Negative temp id so it never collides with a server id
     final optimistic = {
-      'id': (_lastId ?? 0) + 1,
+      'id': -DateTime.now().microsecondsSinceEpoch,
       'content': event.content,
       'sender': {'username': 'You'},
       'created_at': DateTime.now().toIso8601String(),
@@ -109,20 +110,28 @@ class ChatBloc extends Bloc<ChatEvent, ChatState> {
     if (state is ChatLoaded) {
       final current = (state as ChatLoaded).messages;
       final updated = [...current, optimistic];
-      _lastId = optimistic['id'] as int;
       emit(ChatLoaded(updated, isSending: true));
     } else if (state is ChatEmpty) {
       emit(ChatLoaded([optimistic], isSending: true));
     }
 
     try {
-      await _api.post(
+      final res = await _api.post(
         'messages/',
         data: {'trip': event.tripId, 'content': event.content},
       );
-      // Reload to get server-generated IDs
-      if (_currentTripId != null) {
-        add(ChatLoadRequested(_currentTripId!));
+      // Swap the optimistic entry for the server copy (real id) instead of reloading
+      final saved = Map<String, dynamic>.from(res.data as Map);
+      if (state is ChatLoaded) {
+        final current = (state as ChatLoaded).messages;
+        final alreadyReceived = current.any((m) => m['id'] == saved['id']);
+        final updated = [
+          for (final m in current)
+            if (!identical(m, optimistic)) m,
+          if (!alreadyReceived) saved,
+        ];
+        _lastId = saved['id'] as int;
+        emit(ChatLoaded(updated));
       }
     } catch (e) {
       // On error, revert optimistic update
@@ -139,12 +148,19 @@ class ChatBloc extends Bloc<ChatEvent, ChatState> {
   ) async {
     if (state is ChatLoaded) {
       final current = (state as ChatLoaded).messages;
+      // Our own sends and reconnect backfills can arrive more than once
+      if (current.any((m) => m['id'] == event.message['id'])) {
+        return;
+      }
       final updated = [...current, event.message];
       _lastId = event.message['id'] as int? ?? _lastId;
       emit(ChatLoaded(updated));
     }
   }
 
+  /// Newest server message id seen, used to resume the socket with `last_seen_id`.
+  int? get lastId => _lastId;
+
   String _parseError(Object? error) {
     if (error.toString().contains('401')) {
       return 'Session expired. Please log in again.';
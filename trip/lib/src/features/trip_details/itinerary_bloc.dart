@@ -73,7 +73,7 @@ class ItineraryBloc extends Bloc<ItineraryEvent, ItineraryState> {
         'itinerary-items/',
         query: {'trip': event.tripId},
       );
-      final items = List<Map<String, dynamic>>.from(res.data as List);
+      final items = List<Map<String, dynamic>>.from(res.data['results'] as List);
       items.sort((a, b) => (a['order'] as int).compareTo(b['order'] as int));
 
       if (items.isEmpty) {
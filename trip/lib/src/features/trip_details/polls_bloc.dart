@@ -69,7 +69,7 @@ class PollsBloc extends Bloc<PollsEvent, PollsState> {
     _currentTripId = event.tripId;
     try {
       final res = await _api.get('polls/', query: {'trip': event.tripId});
-      final polls = List<Map<String, dynamic>>.from(res.data as List);
+      final polls = List<Map<String, dynamic>>.from(res.data['results'] as List);
 
       if (polls.isEmpty) {
         emit(PollsEmpty());
@@ -294,21 +294,44 @@ class _ChatTabState extends State<ChatTab> {
         host: uri.host,
         port: uri.port,
         path: '${pathUp}ws/trips/${widget.tripId}/',
+        queryParameters: _chatBloc.lastId == null
+            ? null
+            : {'last_seen_id': '${_chatBloc.lastId}'},
+      );
+      // Browsers can't set headers on WebSocket requests, so the JWT rides as a subprotocol
+      final token = apiClient.accessToken;
+      _channel = WebSocketChannel.connect(
+        wsUri,
+        protocols: token == null ? null : ['bearer', token],
       );
-      _channel = WebSocketChannel.connect(wsUri);
       _channel!.stream.listen((event) {
         try {
           final data = event is String ? event : String.fromCharCodes(event);
           final decoded = _tryDecodeJson(data);
-          if (decoded is Map && decoded['type'] == 'chat') {
-            final msg = Map<String, dynamic>.from(decoded['message'] as Map);
-            _chatBloc.add(ChatMessageReceived(msg));
+          if (decoded is Map && decoded['type'] == 'batch') {
+            // Server coalesces bursts into one frame
+            for (final e in decoded['events'] as List) {
+              _handleFrame(e as Map);
+            }
+          } else if (decoded is Map) {
+            _handleFrame(decoded);
           }
         } catch (_) {}
       });
     } catch (_) {}
   }
 
+  void _handleFrame(Map decoded) {
+    if (decoded['type'] == 'chat') {
+      final msg = Map<String, dynamic>.from(decoded['message'] as Map);
+      _chatBloc.add(ChatMessageReceived(msg));
+    } else if (decoded['type'] == 'chat.backfill') {
+      for (final m in decoded['messages'] as List) {
+        _chatBloc.add(ChatMessageReceived(Map<String, dynamic>.from(m as Map)));
+      }
+    }
+  }
+
   dynamic _tryDecodeJson(String s) {
     try {
       return s.isEmpty
@@ -66,7 +66,8 @@ class TripsBloc extends Bloc<TripsEvent, TripsState> {
       }
       try {
         final res = await _api.get('trips/');
-        final list = (res.data as List)
+        final results = res.data['results'] as List;
+        final list = results
             .map(
               (e) => TripSummary(
                 id: e['id'] as int,
@@ -76,7 +77,7 @@ class TripsBloc extends Bloc<TripsEvent, TripsState> {
             )
             .toList();
         final box = await Hive.openBox('cache');
-        await box.put('trips', res.data);
+        await box.put('trips', results);
         emit(TripsLoaded(list));
       } catch (e) {
         // Fallback to cached
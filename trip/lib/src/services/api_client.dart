@@ -7,6 +7,9 @@ class ApiClient {
 
   String? _accessToken;
 
+  // GET responses by URL with their ETag, replayed when the server answers 304
+  final Map<String, (String, dynamic)> _etagCache = {};
+
   ApiClient({String? initialToken}) {
     _accessToken = initialToken;
     _dio = Dio(
@@ -101,6 +104,9 @@ class ApiClient {
 
   // ignore: unnecessary_getters_setters
   set accessToken(String? token) {
+    if (token != _accessToken) {
+      _etagCache.clear();
+    }
     _accessToken = token;
   }
 
@@ -117,7 +123,35 @@ class ApiClient {
     return _dio.post(path, data: data, queryParameters: query);
   }
 
-  Future<Response<dynamic>> get(String path, {Map<String, dynamic>? query}) {
-    return _dio.get(path, queryParameters: query);
+  Future<Response<dynamic>> get(
+    String path, {
+    Map<String, dynamic>? query,
+  }) async {
+    final key = Uri(path: path, queryParameters: query?.map(
+      (k, v) => MapEntry(k, '$v'),
+    )).toString();
+    final cached = _etagCache[key];
+    final res = await _dio.get(
+      path,
+      queryParameters: query,
+      options: Options(
+        headers: cached != null ? {'If-None-Match': cached.$1} : null,
+        validateStatus: (s) => s != null && (s < 300 || s == 304),
+      ),
+    );
+    if (res.statusCode == 304 && cached != null) {
+      // Unchanged since last fetch: hand back the cached body as a 200
+      return Response(
+        requestOptions: res.requestOptions,
+        statusCode: 200,
+        data: cached.$2,
+        headers: res.headers,
+      );
+    }
+    final etag = res.headers.value('etag');
+    if (etag != null) {
+      _etagCache[key] = (etag, res.data);
+    }
+    return res;
   }
 }